@@ -7,21 +7,40 @@ from logging_config import get_logger
 
 logger = get_logger(__name__)
 
+# Rough sizes used to estimate prompt tokens before a run.
+_CHARS_PER_TOKEN = 4
+_HEADLINE_CHARS = 100
+_LINK_CHARS = 120
+_PROMPT_TOKENS = 300  # fixed instructions + JSON schema
+
 
 class GptAnalyzer:
     """
     Expects:
       items = { "TSM": [ {"title": "...", "link": "..."}, ... ], "NVDA": [...] }
+      (articles may also carry "summary": lead text added by ArticleEnricher)
     Returns:
       { "TSM": {"summary_bullets": [...], "sentiment": "...", "reasons": [...]}, ... }
     """
-    def __init__(self, model: str = "gpt-4o-mini", max_titles_per_ticker: int = 12):
+    def __init__(self, model: str = "gpt-4o-mini", max_titles_per_ticker: int = 12, max_tickers_per_request: int = 15, max_summary_chars: int = 400, max_output_tokens: int = 2000):
         api_key = os.getenv("OPENAI_API_KEY")
         if not api_key:
             raise ValueError("OPENAI_API_KEY environment variable is not set.")
         self.client = OpenAI(api_key=api_key)
         self.model = model
         self.max_titles = max_titles_per_ticker
+        self.max_tickers_per_request = max_tickers_per_request
+        self.max_summary_chars = max_summary_chars
+        self.max_output_tokens = max_output_tokens
+        # Accumulated from response.usage across calls
+        self.usage = {"requests": 0, "input_tokens": 0, "output_tokens": 0, "total_tokens": 0}
+
+    def tokens_per_ticker(self, with_summaries: bool = False) -> int:
+        """Upper-bound estimate of LLM tokens (prompt + completion) one ticker costs, from this analyzer's limits."""
+        per_headline = _HEADLINE_CHARS + (self.max_summary_chars + 10 if with_summaries else 0)
+        chars = self.max_titles * per_headline + 2 * _LINK_CHARS + 40
+        per_request = _PROMPT_TOKENS + self.max_output_tokens
+        return chars // _CHARS_PER_TOKEN + -(-per_request // max(1, self.max_tickers_per_request))
 
     def analyze(self, symbol: str, articles: List[Dict]) -> Dict:
         return self.analyze_batch({symbol: articles}).get(symbol, {
@@ -34,12 +53,13 @@ class GptAnalyzer:
         for symbol, arts in (items or {}).items():
             if not symbol or not arts:
                 continue
-            titles, links = [], []
+            titles, summaries, links = [], [], []
             for a in arts:
                 t = (a.get("title") or "").strip()
                 if not t:
                     continue
                 titles.append(t)
+                summaries.append((a.get("summary") or "").strip()[:self.max_summary_chars])
                 if a.get("link"):
                     links.append(a["link"])
                 if len(titles) >= self.max_titles:
@@ -48,18 +68,31 @@ class GptAnalyzer:
                 sections.append({
                     "symbol": symbol,
                     "headlines": titles,
+                    "summaries": summaries,
                     "links": links[:2],  # small context only
                 })
         if not sections:
             return {}
         logger.debug("Prepared sections for GPT analysis:\n %s", sections)
 
+        # Keep each response within max_output_tokens by bounding tickers per request
+        out: Dict[str, Dict] = {}
+        step = max(1, self.max_tickers_per_request)
+        for i in range(0, len(sections), step):
+            out.update(self._analyze_sections(sections[i:i + step]))
+        return out
+
+    def _analyze_sections(self, sections: List[Dict]) -> Dict[str, Dict]:
         # Build compact instruction (JSON-only response)
         parts = []
         for s in sections:
-            hlines = "\n".join(f"- {h}" for h in s["headlines"])
+            hlines = "\n".join(
+                f"- {h}" + (f"\n  Lead: {d}" if d else "")
+                for h, d in zip(s["headlines"], s["summaries"])
+            )
             extra = ("\nTop sources:\n" + "\n".join(f"- {u}" for u in s["links"])) if s["links"] else ""
             parts.append(f"### Ticker: {s['symbol']}\nHeadlines:\n{hlines}{extra}\n")
+        sections_text = "\n".join(parts)
 
         prompt = (f"""
             "You are a financial news analyst. Treat each ticker independently.\n"
@@ -80,7 +113,7 @@ class GptAnalyzer:
             "  1) Summarize the likely impact in 3-5 concise bullets\n"
             "  2) Provide overall sentiment as one of {{positive|neutral|negative}} with 1-2 brief reasons.\n\n"
             "Return ONLY valid minified JSON (no code fences, no commentary, no explanations).\n\n"
-            "SECTIONS:\n {'\n'.join(parts)}""".strip()
+            "SECTIONS:\n {sections_text}""".strip()
         )
 
         logger.debug("Constructed GPT prompt %s", prompt)
@@ -91,8 +124,9 @@ class GptAnalyzer:
             model=self.model,
             input=prompt,
             temperature=0.2,
-            max_output_tokens=2000,  # keep bounded
+            max_output_tokens=self.max_output_tokens,  # keep bounded
             )
+            self._record_usage(getattr(resp, "usage", None))
 
             # Use the SDK JSON mode output directly if supported
             raw = getattr(resp, "output_text", "") or getattr(resp, "output_json", "") or ""
@@ -123,4 +157,9 @@ class GptAnalyzer:
                 "sentiment": row.get("sentiment"),
                 "reasons": row.get("reasons", []),
             }
-        return out
\ No newline at end of file
+        return out
+
+    def _record_usage(self, usage) -> None:
+        self.usage["requests"] += 1
+        for key in ("input_tokens", "output_tokens", "total_tokens"):
+            self.usage[key] += int(getattr(usage, key, 0) or 0)
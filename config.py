@@ -26,3 +26,4 @@ SNAPTRADE_CONSUMER_KEY = os.getenv("SNAPTRADE_CONSUMER_KEY")
 SNAPTRADE_USER_ID = os.getenv("SNAPTRADE_USER_ID")
 
 PORTFOLIO_PROVIDER = os.getenv("PORTFOLIO_PROVIDER", "snaptrade")
+PORTFOLIO_FILE = os.getenv("PORTFOLIO_FILE")
@@ -0,0 +1,4 @@
+from .work_queue import WorkQueue
+from .sharding import run_coordinator, run_worker
+
+__all__ = ['WorkQueue', 'run_coordinator', 'run_worker']
@@ -0,0 +1,185 @@
+import multiprocessing
+import os
+import socket
+import threading
+import time
+import uuid
+from typing import Dict, List, Tuple
+
+from logging_config import get_logger, setup_logging
+from .work_queue import WorkQueue
+
+logger = get_logger(__name__)
+
+
+def _owner_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+def run_worker(
+    queue_path: str | None = None,
+    run_id: str | None = None,
+    *,
+    poll_interval: float = 2.0,
+    idle_timeout: float = 0.0,
+) -> int:
+    """
+    Claim units from the queue, fetch + dedupe (+ enrich) + analyze their tickers, and
+    store {"items": ..., "analysis": ..., "usage": {"requests": n, "llm_tokens": n}}
+    as the unit result. A background
+    thread heartbeats the lease while a unit is being processed.
+
+    Keeps polling while any unit is pending or leased (for `run_id`, or in any
+    run), since a lease held elsewhere may expire and need reassigning. Once
+    nothing is outstanding it exits, or, without a `run_id`, waits up to
+    `idle_timeout` seconds for a coordinator to enqueue work. Returns the
+    number of units completed.
+    """
+    setup_logging()
+    # Imported here so spawned worker processes only load what they use.
+    from analysis.gpt_analyzer import GptAnalyzer
+    from news_fetcher.article_enricher import maybe_enrich
+    from news_fetcher.google_news_fetcher import GoogleNewsRSSFetcher
+    from news_fetcher.news_collector import collect_news, fetch_request_count, log_fetch_stats
+    from news_fetcher.reddit_fetcher import RedditFetcher
+
+    queue = WorkQueue(queue_path)
+    owner = _owner_id()
+    news, reddit, analyzer = GoogleNewsRSSFetcher(), RedditFetcher(), GptAnalyzer()
+    logger.info("Worker %s started on %s", owner, queue.path)
+
+    done = 0
+    idle_since = time.monotonic()
+    while True:
+        claimed = queue.claim(owner, run_id)
+        if claimed is None:
+            if queue.outstanding(run_id):
+                idle_since = time.monotonic()  # other workers hold leases that may still expire
+            elif run_id is not None or time.monotonic() - idle_since >= idle_timeout:
+                break
+            time.sleep(poll_interval)
+            continue
+
+        unit_id, unit_run, tickers = claimed
+        logger.info("Worker %s processing unit %d of run %s (%d tickers)", owner, unit_id, unit_run, len(tickers))
+        stop = threading.Event()
+
+        def heartbeat() -> None:
+            while not stop.wait(queue.lease_seconds / 3):
+                if not queue.heartbeat(unit_id, owner):
+                    logger.warning("Lost lease on unit %d", unit_id)
+                    return
+
+        hb = threading.Thread(target=heartbeat, daemon=True)
+        hb.start()
+        requests_before, tokens_before = fetch_request_count(), analyzer.usage["total_tokens"]
+        try:
+            items = maybe_enrich(collect_news(tickers, news, reddit))
+            analysis = analyzer.analyze_batch(items) if items else {}
+            usage = {
+                "requests": fetch_request_count() - requests_before,
+                "llm_tokens": analyzer.usage["total_tokens"] - tokens_before,
+            }
+            if queue.complete(unit_id, owner, {"items": items, "analysis": analysis, "usage": usage}):
+                done += 1
+            else:
+                logger.warning("Unit %d was reassigned before completion; result discarded", unit_id)
+        except Exception as e:
+            logger.exception("Worker %s failed unit %d", owner, unit_id)
+            queue.fail(unit_id, owner, repr(e))
+        finally:
+            stop.set()
+            hb.join()
+
+    log_fetch_stats()
+    logger.info("Worker %s finished: %d units completed", owner, done)
+    return done
+
+
+def run_coordinator(
+    tickers: List[str],
+    queue_path: str | None = None,
+    *,
+    workers: int = 2,
+    unit_size: int = 25,
+    timeout: float = 3600.0,
+    poll_interval: float = 2.0,
+    max_restarts: int = 3,
+    unclaimed_timeout: float = 300.0,
+) -> Tuple[Dict[str, List[Dict]], Dict[str, Dict], Dict[str, int]]:
+    """
+    Shard `tickers` into work units, start `workers` local worker processes
+    (more can join from other hosts with `main.py --mode worker --queue ...`)
+    and wait until every unit is done or failed. Local workers that die while
+    work remains are replaced up to `max_restarts` times; their leased units
+    are picked up again once the lease expires. If units stay pending with
+    none leased for `unclaimed_timeout` seconds, no worker is serving the
+    queue and the coordinator gives up.
+
+    Returns (items, analysis, usage) merged across units: the same items and
+    analysis shapes the single-process path produces, and the requests and
+    LLM tokens the completed units spent.
+    """
+    queue = WorkQueue(queue_path)
+    run_id = uuid.uuid4().hex
+    queue.enqueue(run_id, list(tickers), unit_size)
+
+    ctx = multiprocessing.get_context("spawn")
+    procs: List = []
+
+    def spawn() -> None:
+        p = ctx.Process(target=run_worker, args=(str(queue.path), run_id), daemon=False)
+        p.start()
+        procs.append(p)
+
+    for _ in range(max(0, workers)):
+        spawn()
+
+    deadline = time.monotonic() + timeout
+    restarts = 0
+    last_active = time.monotonic()
+    try:
+        while True:
+            counts = queue.progress(run_id)
+            if not counts["pending"] and not counts["leased"]:
+                break
+            now = time.monotonic()
+            if now > deadline:
+                logger.error("Coordinator timed out with units outstanding: %s", counts)
+                break
+            if counts["leased"]:
+                last_active = now
+            elif now - last_active > unclaimed_timeout:
+                logger.error("No worker claimed a unit for %.0fs; giving up with units outstanding: %s", unclaimed_timeout, counts)
+                break
+            for p in [p for p in procs if not p.is_alive()]:
+                procs.remove(p)
+                if p.exitcode != 0 and restarts < max_restarts:
+                    logger.warning("Worker pid=%s exited with %s; starting a replacement", p.pid, p.exitcode)
+                    restarts += 1
+                    spawn()
+            if workers and not procs:
+                logger.error("All local workers exited with units outstanding: %s", counts)
+                break
+            time.sleep(poll_interval)
+    finally:
+        for p in procs:
+            p.join(timeout=poll_interval)
+            if p.is_alive():
+                p.terminate()
+
+    items: Dict[str, List[Dict]] = {}
+    analysis: Dict[str, Dict] = {}
+    usage = {"requests": 0, "llm_tokens": 0}
+    for result in queue.results(run_id):
+        items.update(result.get("items") or {})
+        analysis.update(result.get("analysis") or {})
+        for key, n in (result.get("usage") or {}).items():
+            usage[key] = usage.get(key, 0) + n
+
+    failed = queue.failed_tickers(run_id)
+    if failed:
+        logger.error("%d tickers failed after retries: %s", len(failed), ", ".join(failed[:20]))
+    logger.info("Coordinator merged %d/%d tickers with news, %d analyzed (run %s)", len(items), len(tickers), len(analysis), run_id)
+    queue.purge(run_id)
+    return items, analysis, usage
@@ -0,0 +1,185 @@
+import json
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Tuple
+
+from logging_config import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_QUEUE_PATH = Path("./data/work_queue.sqlite")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS units (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_id TEXT NOT NULL,
+    tickers TEXT NOT NULL,
+    state TEXT NOT NULL DEFAULT 'pending',
+    owner TEXT,
+    lease_expires REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    result TEXT,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS units_run_state ON units (run_id, state);
+"""
+
+
+class WorkQueue:
+    """
+    SQLite-backed queue of ticker work units with leases.
+
+    A worker claims a unit by leasing it for `lease_seconds` and keeps the
+    lease alive with heartbeat(). If the worker crashes, the lease expires
+    and the unit becomes claimable again, up to `max_attempts` times before it
+    is marked failed. Claims run in an IMMEDIATE transaction, so concurrent
+    processes never lease the same unit twice.
+
+    The file uses SQLite's default rollback journal, which relies only on file
+    locks, so hosts can share it over a network filesystem whose locking
+    works (SQLite can't detect broken network locks; e.g. NFS needs a lock
+    daemon). WAL mode (`wal=True`, or WORK_QUEUE_WAL=1) is faster but needs
+    shared memory, so only use it when every worker runs on the same host.
+
+    Every call opens its own short-lived connection, so one instance can be
+    used from several threads.
+    """
+
+    def __init__(
+        self,
+        path: str | os.PathLike | None = None,
+        *,
+        lease_seconds: float = 300.0,
+        max_attempts: int = 3,
+        wal: bool | None = None,
+    ):
+        self.path = Path(path or os.getenv("WORK_QUEUE_PATH") or DEFAULT_QUEUE_PATH)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        if wal is None:
+            wal = (os.getenv("WORK_QUEUE_WAL") or "").strip().lower() in ("1", "true", "yes")
+        with self._connect() as conn:
+            mode = conn.execute(f"PRAGMA journal_mode={'WAL' if wal else 'DELETE'}").fetchone()[0]
+            if mode.lower() != ("wal" if wal else "delete"):
+                logger.warning("Work queue %s stayed in %s journal mode (in use by another process?)", self.path, mode)
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    # ---------- coordinator ----------
+    def enqueue(self, run_id: str, tickers: List[str], unit_size: int = 25) -> int:
+        """Split tickers into units of `unit_size` for `run_id`. Returns number of units created."""
+        step = max(1, unit_size)
+        units = [json.dumps(tickers[i:i + step]) for i in range(0, len(tickers), step)]
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.executemany("INSERT INTO units (run_id, tickers) VALUES (?, ?)", [(run_id, u) for u in units])
+            conn.execute("COMMIT")
+        logger.info("Enqueued %d units (%d tickers) for run %s", len(units), len(tickers), run_id)
+        return len(units)
+
+    def progress(self, run_id: str) -> Dict[str, int]:
+        """Counts of units by state ('pending', 'leased', 'done', 'failed') for a run."""
+        counts = {"pending": 0, "leased": 0, "done": 0, "failed": 0}
+        with self._connect() as conn:
+            for state, n in conn.execute("SELECT state, COUNT(*) FROM units WHERE run_id = ? GROUP BY state", (run_id,)):
+                counts[state] = n
+        return counts
+
+    def outstanding(self, run_id: str | None = None) -> int:
+        """Units still pending or leased, for one run or across all runs."""
+        sql = "SELECT COUNT(*) FROM units WHERE state IN ('pending', 'leased')"
+        params: List[Any] = []
+        if run_id:
+            sql += " AND run_id = ?"
+            params.append(run_id)
+        with self._connect() as conn:
+            return conn.execute(sql, params).fetchone()[0]
+
+    def results(self, run_id: str) -> Iterator[Dict[str, Any]]:
+        with self._connect() as conn:
+            for (result,) in conn.execute("SELECT result FROM units WHERE run_id = ? AND state = 'done'", (run_id,)):
+                yield json.loads(result)
+
+    def failed_tickers(self, run_id: str) -> List[str]:
+        with self._connect() as conn:
+            rows = conn.execute("SELECT tickers FROM units WHERE run_id = ? AND state = 'failed'", (run_id,)).fetchall()
+        return [t for (tickers,) in rows for t in json.loads(tickers)]
+
+    def purge(self, run_id: str) -> None:
+        with self._connect() as conn:
+            conn.execute("DELETE FROM units WHERE run_id = ?", (run_id,))
+
+    # ---------- worker ----------
+    def claim(self, owner: str, run_id: str | None = None) -> Tuple[int, str, List[str]] | None:
+        """
+        Lease the oldest pending (or lease-expired) unit, optionally limited to one run.
+        Returns (unit_id, run_id, tickers), or None when nothing is claimable right now.
+        """
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                # Expired leases that have used up their attempts are given up on.
+                conn.execute(
+                    "UPDATE units SET state = 'failed', error = 'lease expired', owner = NULL "
+                    "WHERE state = 'leased' AND lease_expires < ? AND attempts >= ?",
+                    (now, self.max_attempts),
+                )
+                sql = (
+                    "SELECT id, run_id, tickers FROM units "
+                    "WHERE (state = 'pending' OR (state = 'leased' AND lease_expires < ?))"
+                )
+                params: List[Any] = [now]
+                if run_id:
+                    sql += " AND run_id = ?"
+                    params.append(run_id)
+                row = conn.execute(sql + " ORDER BY id LIMIT 1", params).fetchone()
+                if row is None:
+                    conn.execute("COMMIT")
+                    return None
+                conn.execute(
+                    "UPDATE units SET state = 'leased', owner = ?, lease_expires = ?, attempts = attempts + 1 WHERE id = ?",
+                    (owner, now + self.lease_seconds, row[0]),
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return row[0], row[1], json.loads(row[2])
+
+    def heartbeat(self, unit_id: int, owner: str) -> bool:
+        """Extend the lease. False means the lease was lost and the unit may be reassigned."""
+        with self._connect() as conn:
+            cur = conn.execute(
+                "UPDATE units SET lease_expires = ? WHERE id = ? AND owner = ? AND state = 'leased'",
+                (time.time() + self.lease_seconds, unit_id, owner),
+            )
+            return cur.rowcount == 1
+
+    def complete(self, unit_id: int, owner: str, result: Dict[str, Any]) -> bool:
+        with self._connect() as conn:
+            cur = conn.execute(
+                "UPDATE units SET state = 'done', result = ?, lease_expires = NULL WHERE id = ? AND owner = ? AND state = 'leased'",
+                (json.dumps(result), unit_id, owner),
+            )
+            return cur.rowcount == 1
+
+    def fail(self, unit_id: int, owner: str, error: str) -> None:
+        """Release a unit after an error: back to pending for a retry, or failed after max_attempts."""
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE units SET state = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+                "owner = NULL, lease_expires = NULL, error = ? WHERE id = ? AND owner = ? AND state = 'leased'",
+                (self.max_attempts, error, unit_id, owner),
+            )
@@ -0,0 +1,3 @@
+from .sentiment_history import SentimentHistoryStore
+
+__all__ = ['SentimentHistoryStore']
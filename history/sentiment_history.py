@@ -0,0 +1,209 @@
+import hashlib
+import math
+import mmap
+import os
+import struct
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import date
+from pathlib import Path
+from typing import Any, Dict, Iterable, List
+from urllib.parse import quote
+
+from logging_config import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_HISTORY_DIR = Path("./data/history")
+
+# One fixed-size little-endian record per ticker per run:
+#   day (date ordinal), sentiment (-1/0/1, or MISSING), headline count,
+#   bullets hash (first 8 bytes of blake2b), quantity, position value.
+RECORD = struct.Struct("<ibHQdd")
+MISSING = -128
+
+SENTIMENT_SCORES = {"positive": 1, "neutral": 0, "negative": -1}
+COLUMNS = ("day", "sentiment", "headlines", "bullets_hash", "qty", "value")
+_TYPECODES = ("i", "b", "H", "Q", "d", "d")
+
+
+def _bullets_hash(bullets: Iterable[Any]) -> int:
+    h = hashlib.blake2b(digest_size=8)
+    for b in bullets or []:
+        h.update(str(b).strip().encode("utf-8"))
+        h.update(b"\x00")
+    return int.from_bytes(h.digest(), "little")
+
+
+class _DayIndex:
+    """Read-only sequence view over the `day` field of a mapped history file."""
+
+    def __init__(self, buf):
+        self.buf = buf
+
+    def __len__(self) -> int:
+        return len(self.buf) // RECORD.size
+
+    def __getitem__(self, i: int) -> int:
+        return struct.unpack_from("<i", self.buf, i * RECORD.size)[0]
+
+
+class SentimentHistoryStore:
+    """
+    Append-only per-ticker history of analysis results and position values.
+
+    Each ticker gets its own file of fixed-size binary records ordered by day,
+    so appends are a single write and range queries are a binary search over
+    the memory-mapped file followed by one unpack of the matching slice.
+    Several runs on the same day are all kept; queries use the last one.
+
+    Usage:
+        store = SentimentHistoryStore()
+        store.record_run(positions, analysis, items)
+        trends = store.sentiment_deltas(tickers)
+    """
+
+    def __init__(self, root: str | os.PathLike | None = None):
+        self.root = Path(root or os.getenv("SENTIMENT_HISTORY_DIR") or DEFAULT_HISTORY_DIR)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, ticker: str) -> Path:
+        # Percent-encode everything but letters, digits, "-", "." and "_" so
+        # distinct tickers (e.g. BRK/B vs BRK_B) never share a file.
+        return self.root / f"{quote(ticker.upper(), safe='')}.bin"
+
+    # ---------- writes ----------
+    def append(
+        self,
+        ticker: str,
+        *,
+        day: date | None = None,
+        sentiment: str | None = None,
+        bullets: Iterable[Any] | None = None,
+        headline_count: int = 0,
+        qty: float | None = None,
+        position_value: float | None = None,
+    ) -> None:
+        day_ord = (day or date.today()).toordinal()
+        path = self._path(ticker)
+
+        # Keep the file sorted by day so range queries can binary search it.
+        size = path.stat().st_size if path.exists() else 0
+        if size % RECORD.size:
+            logger.warning("Dropping torn trailing record in %s", path)
+            size -= size % RECORD.size
+            os.truncate(path, size)
+        if size:
+            with path.open("rb") as f:
+                f.seek(size - RECORD.size)
+                last_day = struct.unpack("<i", f.read(4))[0]
+            if day_ord < last_day:
+                raise ValueError(f"History for {ticker} already has data after {date.fromordinal(day_ord)}.")
+
+        score = SENTIMENT_SCORES.get((sentiment or "").lower(), MISSING)
+        rec = RECORD.pack(
+            day_ord,
+            score,
+            min(max(int(headline_count or 0), 0), 0xFFFF),
+            _bullets_hash(bullets or []),
+            float(qty) if qty is not None else math.nan,
+            float(position_value) if position_value is not None else math.nan,
+        )
+        with path.open("ab") as f:
+            f.write(rec)
+
+    def record_run(
+        self,
+        positions: List[Dict[str, Any]],
+        analysis_by_ticker: Dict[str, Dict[str, Any]] | None,
+        items: Dict[str, List[Dict]] | None = None,
+        *,
+        day: date | None = None,
+    ) -> int:
+        """Append one record per position ticker for this run. Returns number of records written."""
+        analysis_by_ticker = analysis_by_ticker or {}
+        items = items or {}
+
+        # Aggregate per ticker; the same ticker can be held in several accounts.
+        totals: Dict[str, Dict[str, float | None]] = {}
+        for pos in positions:
+            t = pos["ticker"]
+            acc = totals.setdefault(t, {"qty": 0.0, "value": None})
+            qty = float(pos.get("qty") or 0)
+            acc["qty"] += qty
+            price = pos.get("last_price")
+            if price is not None:
+                acc["value"] = (acc["value"] or 0.0) + qty * float(price)
+
+        written = 0
+        for t, acc in totals.items():
+            res = analysis_by_ticker.get(t) or {}
+            try:
+                self.append(
+                    t,
+                    day=day,
+                    sentiment=res.get("sentiment"),
+                    bullets=res.get("summary_bullets") or [],
+                    headline_count=len(items.get(t) or []),
+                    qty=acc["qty"],
+                    position_value=acc["value"],
+                )
+                written += 1
+            except Exception:
+                logger.exception("Failed to record history for %s", t)
+        logger.info("Recorded sentiment history for %d tickers in %s", written, self.root)
+        return written
+
+    # ---------- reads ----------
+    def query(self, ticker: str, start: date | None = None, end: date | None = None) -> Dict[str, array]:
+        """
+        Return columns for records with start <= day <= end (inclusive), as
+        {"day": array('i'), "sentiment": array('b'), ..., "value": array('d')}.
+        """
+        cols = {name: array(code) for name, code in zip(COLUMNS, _TYPECODES)}
+        path = self._path(ticker)
+        if not path.exists() or path.stat().st_size < RECORD.size:
+            return cols
+
+        with path.open("rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            days = _DayIndex(mm)  # a torn trailing write is ignored by __len__
+            lo = bisect_left(days, start.toordinal()) if start else 0
+            hi = bisect_right(days, end.toordinal()) if end else len(days)
+            chunk = mm[lo * RECORD.size:hi * RECORD.size]
+
+        if chunk:
+            for name, code, values in zip(COLUMNS, _TYPECODES, zip(*RECORD.iter_unpack(chunk))):
+                cols[name] = array(code, values)
+        return cols
+
+    def latest_by_day(self, ticker: str, start: date | None = None, end: date | None = None) -> Dict[int, int]:
+        """Map day ordinal -> sentiment score of the last run that day, skipping runs without a sentiment."""
+        cols = self.query(ticker, start, end)
+        out: Dict[int, int] = {}
+        for d, s in zip(cols["day"], cols["sentiment"]):
+            if s != MISSING:
+                out[d] = s
+        return out
+
+    def sentiment_deltas(self, tickers: Iterable[str], *, day: date | None = None) -> Dict[str, Dict[str, float | None]]:
+        """
+        Returns: { "TSM": {"score": 1, "d1": 1.0, "d7": 0.43, "d30": 0.1}, ... }
+
+        `d1` is today's score minus the most recent earlier day's score; `d7`/`d30`
+        are today's score minus the mean daily score over the preceding 7/30 days.
+        Scores are positive=1, neutral=0, negative=-1. Missing data yields None.
+        """
+        today = (day or date.today()).toordinal()
+        out: Dict[str, Dict[str, float | None]] = {}
+        for t in tickers:
+            by_day = self.latest_by_day(t, date.fromordinal(today - 30), date.fromordinal(today))
+            score = by_day.pop(today, None)
+            trend: Dict[str, float | None] = {"score": score, "d1": None, "d7": None, "d30": None}
+            if score is not None and by_day:
+                trend["d1"] = float(score - by_day[max(by_day)])
+                for key, window in (("d7", 7), ("d30", 30)):
+                    prior = [s for d, s in by_day.items() if d >= today - window]
+                    if prior:
+                        trend[key] = score - sum(prior) / len(prior)
+            out[t] = trend
+        return out
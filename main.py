@@ -1,9 +1,19 @@
-from portfolio_provider import SnapTradeProvider
+import argparse
+import os
+
+from portfolio_provider import create_provider
 from news_fetcher.google_news_fetcher import GoogleNewsRSSFetcher as NewsFetcher
 from news_fetcher.reddit_fetcher import RedditFetcher
+from news_fetcher.news_collector import collect_news, fetch_request_count, log_fetch_stats, requests_per_ticker
+from news_fetcher.article_enricher import enrichment_enabled, maybe_enrich
+from distributed import run_coordinator, run_worker
 from analysis.gpt_analyzer import GptAnalyzer
+from history import SentimentHistoryStore
+from scheduler import WatchlistScheduler, load_watchlist
 from reporting.email_reporter import EmailReporter
 from reporting.html_report_builder import (
+    DEFAULT_MAX_EMAIL_BYTES,
+    build_budgeted_html_report,
     build_portfolio_html_report,
     build_plaintext_fallback,
 )
@@ -14,12 +24,33 @@ from logging_config import setup_logging, get_logger
 logger = get_logger(__name__)
 
 
-def main():
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Portfolio news + sentiment email report")
+    parser.add_argument(
+        "--mode", choices=["single", "coordinator", "worker"], default="single",
+        help="single: do everything in this process; coordinator: shard fetch/analysis over a work queue; "
+             "worker: process units from the work queue until it is empty",
+    )
+    parser.add_argument("--queue", default=os.getenv("WORK_QUEUE_PATH"), help="SQLite work queue path (shared between hosts)")
+    parser.add_argument("--workers", type=int, default=int(os.getenv("WORKERS") or os.cpu_count() or 1),
+                        help="local worker processes the coordinator starts (0 = rely on remote workers)")
+    parser.add_argument("--unit-size", type=int, default=25, help="tickers per work unit")
+    parser.add_argument("--wait", type=float, default=float(os.getenv("WORKER_WAIT") or 300),
+                        help="worker mode: seconds to keep polling an empty queue for a coordinator's work before exiting")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
     setup_logging()
-    logger.info("Starting TradingNewsChecker main")
+    logger.info("Starting TradingNewsChecker main (mode=%s)", args.mode)
+
+    if args.mode == "worker":
+        run_worker(args.queue, idle_timeout=args.wait)
+        return
 
     try:
-        provider = SnapTradeProvider()
+        provider = create_provider()
     except Exception as e:
         logger.exception("Failed to initialize portfolio provider: %s", e)
         raise
@@ -29,32 +60,17 @@ def main():
     analyzer = GptAnalyzer()  # e.g., gpt-4o-mini
     reporter = EmailReporter()
 
-    # Get & normalize positions
+    # Get normalized positions
     try:
-        raw = provider.get_positions()
-        logger.info("Fetched positions: count=%d", len(raw or []))
+        positions = provider.get_positions() or []
+        logger.info("Fetched positions: count=%d", len(positions))
     except Exception:
         logger.exception("Error while fetching positions from provider")
-        raw = []
-
-    positions, tickers = [], set()
-    for p in raw or []:
-        if p.get("cash_equivalent"):
-            continue
-        sym = (p.get("symbol") or {}).get("symbol") or {}
-        ticker = sym.get("raw_symbol") or sym.get("symbol")
-        if not ticker:
-            continue
-        tickers.add(ticker)
-        positions.append({
-            "ticker": ticker,
-            "qty": float(p.get("units") or p.get("fractional_units") or 0),
-            "avg_cost": p.get("average_purchase_price"),
-            "last_price": p.get("price"),
-            "account_id": p.get("account_id"),
-        })
-
-    if not positions:
+        positions = []
+    tickers = {p["ticker"] for p in positions}
+    watchlist = load_watchlist()
+
+    if not positions and not watchlist:
         logger.info("No positions found; sending empty report")
         html = build_portfolio_html_report([], {})
         try:
@@ -64,53 +80,62 @@ def main():
             logger.exception("Failed to send empty report")
         return
 
-    # Build {ticker: [{title, link}, ...]} with RSS fetcher
-    items = {}
-    for t in sorted(tickers):
-        combined = []
+    # Spread this run's request/token budget across held and watched symbols;
+    # per-symbol costs start from the fetcher/analyzer limits and then track actual usage
+    enrich = enrichment_enabled()
+    scheduler = WatchlistScheduler(
+        max_requests=int(os.getenv("RUN_MAX_REQUESTS") or 500),
+        max_llm_tokens=int(os.getenv("RUN_MAX_LLM_TOKENS") or 200_000),
+        requests_per_symbol=requests_per_ticker(enrich),
+        tokens_per_symbol=analyzer.tokens_per_ticker(with_summaries=enrich),
+    )
+    planned = scheduler.plan(positions, watchlist)
+
+    symbols = [p["symbol"] for p in planned]
+    if args.mode == "coordinator":
+        # Workers (local processes and/or other hosts) fetch and analyze leased units
+        items, analysis, usage = run_coordinator(symbols, args.queue, workers=args.workers, unit_size=args.unit_size)
+    else:
+        # Build {ticker: [{title, link}, ...]} with RSS fetcher, highest priority first
+        items = collect_news(symbols, news, reddit)
+        log_fetch_stats()
+        items = maybe_enrich(items)  # optional: add article lead text (ENRICH_ARTICLES=1)
+
+        # Batch analysis
         try:
-            arts = news.get_news(t, max_results=8)
-            logger.info("Fetched news for %s (google): %d items", t, len(arts or []))
-            combined.extend(arts)
+            analysis = analyzer.analyze_batch(items) if items else {}
+            logger.info("Completed GPT analysis for %d tickers", len(analysis or {}))
         except Exception:
-            logger.exception("Error fetching Google News for %s", t)
-
-        #TODO: Reddit bounces requests - fix it
-        # try:
-        #     rarts = reddit.get_news(t, max_results=6)
-        #     logger.info("Fetched reddit for %s: %d items", t, len(rarts or []))
-        #     logger.debug("Reddit items: %s", rarts)
-        #     combined.extend(rarts)
-        # except Exception:
-        #     logger.exception("Error fetching reddit for %s", t)
-
-        if combined:
-            # dedupe by title/link
-            seen = set()
-            out = []
-            for a in combined:
-                key = (a.get("title"), a.get("link"))
-                if key in seen:
-                    continue
-                seen.add(key)
-                out.append(a)
-                if len(out) >= 12:
-                    break
-            items[t] = out
-
-    # Batch analysis
+            logger.exception("GPT analysis failed")
+            analysis = {}
+        usage = {"requests": fetch_request_count(), "llm_tokens": analyzer.usage["total_tokens"]}
+
+    scheduler.commit(planned, analysis, usage=usage)
+
+    # Symbols skipped this run keep their last analysis (shown "as of" its date); watchlist-only
+    # symbols with analysis are reported alongside holdings.
+    report_analysis = {**scheduler.cached_analysis(tickers | set(watchlist)), **analysis}
+    watch_positions = [
+        {"ticker": s, "qty": 0.0, "avg_cost": None, "last_price": None, "account_id": None, "account_count": 0, "watchlist": True}
+        for s in watchlist if s not in tickers and s in report_analysis
+    ]
+    report_positions = positions + watch_positions
+
+    # Persist this run and compute day-over-day / 7d / 30d sentiment deltas
+    trends = {}
     try:
-        analysis = analyzer.analyze_batch(items) if items else {}
-        logger.info("Completed GPT analysis for %d tickers", len(analysis or {}))
+        history = SentimentHistoryStore()
+        history.record_run(report_positions, analysis, items)
+        trends = history.sentiment_deltas(sorted(p["ticker"] for p in report_positions))
     except Exception:
-        logger.exception("GPT analysis failed")
-        analysis = {}
+        logger.exception("Failed to update sentiment history")
 
     # Render & send
-    html = build_portfolio_html_report(positions, analysis)
-    text = build_plaintext_fallback(positions, analysis)
+    max_bytes = int(os.getenv("REPORT_MAX_BYTES") or DEFAULT_MAX_EMAIL_BYTES)
+    html, attachments = build_budgeted_html_report(report_positions, report_analysis, trends_by_ticker=trends, max_bytes=max_bytes)
+    text = build_plaintext_fallback(report_positions, report_analysis, trends)
     try:
-        reporter.send_report(html, is_html=True, plain_fallback=text)
+        reporter.send_report(html, is_html=True, plain_fallback=text, attachments=attachments)
         logger.info("Report sent successfully")
     except Exception:
         logger.exception("Failed to send report")
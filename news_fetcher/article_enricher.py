@@ -0,0 +1,290 @@
+import base64
+import binascii
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import TimeoutError as FuturesTimeout
+from pathlib import Path
+from typing import Dict, List, Tuple
+from urllib.parse import urlsplit
+
+import requests
+from bs4 import BeautifulSoup, SoupStrainer
+
+from logging_config import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_CACHE_DIR = Path("./data/article_cache")
+# Bump when cached text may be wrong, so older entries are refetched.
+CACHE_VERSION = 2
+
+# Hosts whose article links are wrappers around the publisher's page. Their
+# own pages only carry the aggregator's boilerplate, never the article.
+AGGREGATOR_HOSTS = frozenset({"news.google.com"})
+_EMBEDDED_URL = re.compile(rb"https?://[\x21-\x7e]+")
+
+try:
+    import lxml  # noqa: F401
+    _PARSER = "lxml"
+except ImportError:
+    _PARSER = "html.parser"
+
+# Only build a tree for the tags we read; skips scripts, navs, etc.
+_STRAINER = SoupStrainer(["p", "meta"])
+
+# Pages requested by this process, across enricher instances.
+_DOWNLOADS = 0
+_DOWNLOADS_LOCK = threading.Lock()
+
+
+def download_count() -> int:
+    """Number of article pages this process has requested so far."""
+    return _DOWNLOADS
+
+
+def is_aggregator(url: str) -> bool:
+    return (urlsplit(url).hostname or "").lower() in AGGREGATOR_HOSTS
+
+
+def resolve_publisher_url(url: str) -> str | None:
+    """
+    Return the publisher URL for an article link. Google News links of the
+    form /rss/articles/<id> are decoded when the id embeds the URL (older ids
+    do; newer ones can only be resolved through Google). Returns None for
+    aggregator links that can't be resolved offline.
+    """
+    if not is_aggregator(url):
+        return url
+    token = urlsplit(url).path.rstrip("/").rsplit("/", 1)[-1]
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+    except (ValueError, binascii.Error):
+        return None
+    m = _EMBEDDED_URL.search(raw)
+    if not m:
+        return None
+    # The id is a protobuf message: the URL is preceded by its varint length,
+    # and other fields may follow it.
+    start, end = m.start(), m.end()
+    if start >= 2 and raw[start - 2] >= 0x80 and raw[start - 1] < 0x80:
+        end = min(end, start + ((raw[start - 2] & 0x7F) | (raw[start - 1] << 7)))
+    elif start >= 1 and raw[start - 1] < 0x80:
+        end = min(end, start + raw[start - 1])
+    resolved = raw[start:end].decode("ascii")
+    return None if is_aggregator(resolved) else resolved
+
+
+def extract_lead(html: bytes | str, max_paragraphs: int = 3, max_chars: int = 1200) -> str:
+    """Return the first substantial paragraphs of a page, falling back to its meta description."""
+    soup = BeautifulSoup(html, _PARSER, parse_only=_STRAINER)
+    paras = []
+    for p in soup.find_all("p"):
+        text = " ".join(p.get_text(" ", strip=True).split())
+        if len(text) >= 60:  # skip bylines, captions, cookie banners
+            paras.append(text)
+            if len(paras) >= max_paragraphs:
+                break
+    if not paras:
+        for attrs in ({"property": "og:description"}, {"name": "description"}):
+            meta = soup.find("meta", attrs=attrs)
+            if meta and meta.get("content"):
+                paras.append(" ".join(meta["content"].split()))
+                break
+    return " ".join(paras)[:max_chars]
+
+
+class ArticleEnricher:
+    """
+    Adds a "summary" (lead paragraphs) to each {title, link} article before analysis.
+
+    Linked pages are downloaded concurrently, each capped at `max_bytes` and
+    `timeout` seconds, with the whole stage bounded by `deadline` seconds;
+    whatever isn't done by then is left unenriched. Extracted text is cached
+    on disk keyed by URL, so a page is downloaded and parsed at most once
+    across runs and tickers. Failed downloads are cached too, and retried
+    after `failure_ttl` seconds; extracted text is kept for `ttl` seconds.
+    Expired files are pruned at the start of each enrich(), so the cache
+    (which the daily workflow persists) stays bounded.
+
+    Aggregator links (AGGREGATOR_HOSTS) are resolved to the publisher's URL
+    when possible and skipped otherwise; a page that still ends up on an
+    aggregator host after redirects is treated as a failure.
+
+    Usage:
+        items = ArticleEnricher().enrich(items)
+    """
+
+    def __init__(
+        self,
+        cache_dir: str | os.PathLike | None = None,
+        *,
+        max_workers: int = 8,
+        timeout: float = 6.0,
+        max_bytes: int = 512_000,
+        deadline: float = 45.0,
+        max_paragraphs: int = 3,
+        max_chars: int = 1200,
+        failure_ttl: float = 24 * 3600,
+        ttl: float = 14 * 24 * 3600,
+        user_agent: str | None = None,
+    ):
+        self.cache_dir = Path(cache_dir or os.getenv("ARTICLE_CACHE_DIR") or DEFAULT_CACHE_DIR)
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.max_bytes = max_bytes
+        self.deadline = deadline
+        self.max_paragraphs = max_paragraphs
+        self.max_chars = max_chars
+        self.failure_ttl = failure_ttl
+        self.ttl = ttl
+        self.headers = {"User-Agent": user_agent or "Mozilla/5.0 (compatible; TradingNewsChecker/0.1)"}
+
+    # ---------- cache ----------
+    def _cache_path(self, url: str) -> Path:
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return self.cache_dir / key[:2] / f"{key}.json"
+
+    def _cache_get(self, url: str) -> Dict | None:
+        try:
+            with self._cache_path(url).open("r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+        if entry.get("v") != CACHE_VERSION:
+            return None
+        if time.time() - entry.get("fetched_at", 0) > (self.ttl if entry.get("ok") else self.failure_ttl):
+            return None
+        return entry
+
+    def _cache_put(self, url: str, text: str, ok: bool) -> None:
+        path = self._cache_path(url)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(f".{os.getpid()}.tmp")
+            with tmp.open("w", encoding="utf-8") as f:
+                json.dump({"v": CACHE_VERSION, "url": url, "text": text, "ok": ok, "fetched_at": time.time()}, f)
+            os.replace(tmp, path)
+        except OSError:
+            logger.exception("Failed to write article cache for %s", url)
+
+    def prune(self) -> int:
+        """Delete cache files older than the longest TTL. Returns the number removed."""
+        cutoff = time.time() - max(self.ttl, self.failure_ttl)
+        removed = 0
+        for path in self.cache_dir.glob("*/*.json"):
+            try:
+                if path.stat().st_mtime < cutoff:
+                    path.unlink()
+                    removed += 1
+            except OSError:
+                continue  # removed concurrently, or unreadable
+        if removed:
+            logger.info("Pruned %d expired article cache entries from %s", removed, self.cache_dir)
+        return removed
+
+    # ---------- fetch ----------
+    def _download(self, url: str) -> Tuple[str, bytes]:
+        """Return (final URL after redirects, body truncated to max_bytes)."""
+        global _DOWNLOADS
+        with _DOWNLOADS_LOCK:
+            _DOWNLOADS += 1
+        with requests.get(url, headers=self.headers, timeout=self.timeout, stream=True) as resp:
+            resp.raise_for_status()
+            if is_aggregator(resp.url):
+                raise ValueError(f"landed on aggregator page {resp.url}")
+            ctype = resp.headers.get("Content-Type", "")
+            if ctype and "html" not in ctype:
+                raise ValueError(f"not an HTML page ({ctype})")
+            started, chunks, size = time.monotonic(), [], 0
+            for chunk in resp.iter_content(chunk_size=16_384):
+                chunks.append(chunk)
+                size += len(chunk)
+                # Stop at the byte cap; lead paragraphs are near the top anyway.
+                if size >= self.max_bytes or time.monotonic() - started > self.timeout:
+                    break
+            return resp.url, b"".join(chunks)[:self.max_bytes]
+
+    def _fetch_and_extract(self, url: str) -> str:
+        try:
+            _, body = self._download(url)
+            text = extract_lead(body, self.max_paragraphs, self.max_chars)
+        except Exception as e:
+            logger.debug("Article enrichment failed for %s: %s", url, e)
+            self._cache_put(url, "", ok=False)
+            return ""
+        self._cache_put(url, text, ok=bool(text))
+        return text
+
+    def enrich(self, items: Dict[str, List[Dict]]) -> Dict[str, List[Dict]]:
+        """Add "summary" to articles in place where lead text is available; returns `items`."""
+        self.prune()
+        # Original link -> URL to fetch; unresolvable aggregator links are skipped.
+        targets: Dict[str, str] = {}
+        skipped = 0
+        for arts in items.values():
+            for a in arts:
+                link = a.get("link")
+                if not link or link in targets:
+                    continue
+                resolved = resolve_publisher_url(link)
+                if resolved is None:
+                    skipped += 1
+                else:
+                    targets[link] = resolved
+        if skipped:
+            logger.info("Skipping %d aggregator links that could not be resolved to a publisher URL", skipped)
+
+        urls = set(targets.values())
+        texts: Dict[str, str] = {}
+        missing = []
+        for url in urls:
+            entry = self._cache_get(url)
+            if entry is None:
+                missing.append(url)
+            else:
+                texts[url] = entry.get("text") or ""
+
+        if missing:
+            pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="enrich")
+            futures = {pool.submit(self._fetch_and_extract, url): url for url in missing}
+            try:
+                for fut in as_completed(futures, timeout=self.deadline):
+                    texts[futures[fut]] = fut.result()
+            except FuturesTimeout:
+                logger.warning("Article enrichment deadline hit; %d of %d downloads unfinished", len(missing) - sum(f.done() for f in futures), len(missing))
+            finally:
+                pool.shutdown(wait=False, cancel_futures=True)
+
+        enriched = 0
+        for arts in items.values():
+            for a in arts:
+                text = texts.get(targets.get(a.get("link") or "", ""))
+                if text:
+                    a["summary"] = text
+                    enriched += 1
+        logger.info(
+            "Enriched %d articles (%d urls: %d cached, %d downloaded)",
+            enriched, len(urls), len(urls) - len(missing), len(missing),
+        )
+        return items
+
+
+def enrichment_enabled() -> bool:
+    """True when ENRICH_ARTICLES is set (1/true/yes)."""
+    return (os.getenv("ENRICH_ARTICLES") or "").strip().lower() in ("1", "true", "yes")
+
+
+def maybe_enrich(items: Dict[str, List[Dict]]) -> Dict[str, List[Dict]]:
+    """Run ArticleEnricher when enrichment_enabled(); otherwise return items unchanged."""
+    if not enrichment_enabled():
+        return items
+    try:
+        return ArticleEnricher().enrich(items)
+    except Exception:
+        logger.exception("Article enrichment failed; continuing with headlines only")
+        return items
@@ -4,6 +4,7 @@ from urllib.parse import urlencode
 from typing import List, Dict
 
 from logging_config import get_logger
+from .resilience import CircuitOpenError, ResilientHttp, get_http
 
 
 logger = get_logger(__name__)
@@ -12,8 +13,9 @@ logger = get_logger(__name__)
 class GoogleNewsRSSFetcher:
     BASE = "https://news.google.com/rss/search"
 
-    def __init__(self, hl: str = "en-US", gl: str = "US", ceid: str = "US:en", timeout: int = 10):
+    def __init__(self, hl: str = "en-US", gl: str = "US", ceid: str = "US:en", timeout: int = 10, http: ResilientHttp | None = None):
         self.hl, self.gl, self.ceid, self.timeout = hl, gl, ceid, timeout
+        self.http = http or get_http("google_news")
 
     def _url(self, query: str) -> str:
         params = {"q": query, "hl": self.hl, "gl": self.gl, "ceid": self.ceid}
@@ -33,8 +35,12 @@ class GoogleNewsRSSFetcher:
         try:
             url = self._url(query)
             logger.debug("Requesting Google News RSS for %s (query=%s)", symbol, query)
-            resp = requests.get(url, timeout=self.timeout)
+            resp = self.http.get(url, timeout=self.timeout)
             resp.raise_for_status()
+        except CircuitOpenError as e:
+            # The breaker already warned when it opened; no traceback per skipped ticker.
+            logger.debug("Skipping RSS for %s: %s", symbol, e)
+            return []
         except requests.RequestException as e:
             logger.exception("Failed to fetch RSS for %s: %s", symbol, e)
             return []
@@ -0,0 +1,70 @@
+from typing import Dict, Iterable, List
+
+from logging_config import get_logger
+from .article_enricher import download_count
+from .resilience import latency_report
+
+logger = get_logger(__name__)
+
+# Google News results requested per ticker; each may be downloaded when enriching.
+GOOGLE_MAX_RESULTS = 8
+
+
+def requests_per_ticker(enrich: bool = False) -> int:
+    """Estimated HTTP requests one ticker costs: its news search, plus article pages when enriching."""
+    return 1 + (GOOGLE_MAX_RESULTS if enrich else 0)
+
+
+def fetch_request_count() -> int:
+    """HTTP requests this process has made so far, including hedged duplicates and article downloads."""
+    sent = sum(stats["requests"] + stats["hedged"] for stats in latency_report().values())
+    return sent + download_count()
+
+
+def collect_news(tickers: Iterable[str], news, reddit=None, *, max_per_ticker: int = 12) -> Dict[str, List[Dict]]:
+    """
+    Fetch and dedupe headlines per ticker, in the order given.
+    Returns: {ticker: [{title, link}, ...]}, omitting tickers with no news.
+    """
+    items = {}
+    for t in tickers:
+        combined = []
+        try:
+            arts = news.get_news(t, max_results=GOOGLE_MAX_RESULTS)
+            logger.info("Fetched news for %s (google): %d items", t, len(arts or []))
+            combined.extend(arts)
+        except Exception:
+            logger.exception("Error fetching Google News for %s", t)
+
+        #TODO: Reddit bounces requests - fix it
+        # try:
+        #     rarts = reddit.get_news(t, max_results=6)
+        #     logger.info("Fetched reddit for %s: %d items", t, len(rarts or []))
+        #     logger.debug("Reddit items: %s", rarts)
+        #     combined.extend(rarts)
+        # except Exception:
+        #     logger.exception("Error fetching reddit for %s", t)
+
+        if combined:
+            # dedupe by title/link
+            seen = set()
+            out = []
+            for a in combined:
+                key = (a.get("title"), a.get("link"))
+                if key in seen:
+                    continue
+                seen.add(key)
+                out.append(a)
+                if len(out) >= max_per_ticker:
+                    break
+            items[t] = out
+    return items
+
+
+def log_fetch_stats() -> None:
+    for source, stats in latency_report().items():
+        logger.info(
+            "Fetch stats %s: n=%d p50=%s p95=%s p99=%s hedged=%d (won %d) failures=%d short_circuited=%d circuit=%s",
+            source, stats["count"], stats["p50"], stats["p95"], stats["p99"], stats["hedged"],
+            stats["hedge_wins"], stats["failures"], stats["short_circuited"], stats["circuit"],
+        )
@@ -1,6 +1,7 @@
 import requests
 from typing import List, Dict
 from logging_config import get_logger
+from .resilience import CircuitOpenError, ResilientHttp, get_http
 
 logger = get_logger(__name__)
 
@@ -14,16 +15,20 @@ class RedditFetcher:
 
     SEARCH_URL = "https://www.reddit.com/search.json"
 
-    def __init__(self, user_agent: str | None = None, timeout: int = 8):
+    def __init__(self, user_agent: str | None = None, timeout: int = 8, http: ResilientHttp | None = None):
         self.timeout = timeout
+        self.http = http or get_http("reddit")
         # Reddit requires a User-Agent header; default to an informative one.
         self.headers = {"User-Agent": user_agent or "TradingNewsChecker/0.1 (+https://example.com)"}
 
     def _query(self, q: str, limit: int = 12) -> List[Dict]:
         params = {"q": q, "sort": "new", "limit": limit}
         try:
-            resp = requests.get(self.SEARCH_URL, params=params, headers=self.headers, timeout=self.timeout)
+            resp = self.http.get(self.SEARCH_URL, params=params, headers=self.headers, timeout=self.timeout)
             resp.raise_for_status()
+        except CircuitOpenError as e:
+            logger.debug("Skipping Reddit search for query=%s: %s", q, e)
+            return []
         except requests.RequestException as e:
             logger.exception("Reddit search failed for query=%s: %s", q, e)
             return []
@@ -0,0 +1,209 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict
+
+import requests
+
+from logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# Shared by every source; hedges are short-lived so a small pool is enough.
+_EXECUTOR = ThreadPoolExecutor(max_workers=16, thread_name_prefix="fetch")
+
+
+class CircuitOpenError(requests.RequestException):
+    """Raised instead of making a request while a source's circuit breaker is open."""
+
+
+class LatencyTracker:
+    """Sliding window of successful request latencies (seconds) for one source."""
+
+    def __init__(self, window: int = 200):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def percentile(self, p: float) -> float | None:
+        with self._lock:
+            data = sorted(self._samples)
+        if not data:
+            return None
+        idx = min(len(data) - 1, max(0, round(p / 100 * (len(data) - 1))))
+        return data[idx]
+
+    def summary(self) -> Dict[str, float | int | None]:
+        out: Dict[str, float | int | None] = {"count": len(self)}
+        for p in (50, 95, 99):
+            v = self.percentile(p)
+            out[f"p{p}"] = round(v, 3) if v is not None else None
+        return out
+
+
+class CircuitBreaker:
+    """
+    Classic closed → open → half-open breaker. After `failure_threshold`
+    consecutive failures the circuit opens and calls fail fast for
+    `reset_timeout` seconds; then one probe call is let through, closing the
+    circuit on success or re-opening it on failure.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 60.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open" and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = "half_open"
+                return True
+            return False  # open, or half-open with a probe already in flight
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state, self.failures = "closed", 0
+
+    def record_failure(self) -> bool:
+        """Returns True if this failure opened the circuit."""
+        with self._lock:
+            self.failures += 1
+            if self.state == "half_open" or (self.state == "closed" and self.failures >= self.failure_threshold):
+                self.state, self.opened_at = "open", time.monotonic()
+                return True
+            return False
+
+
+def _is_source_failure(exc: BaseException) -> bool:
+    """Connection errors, timeouts, 5xx and 429 count against a source; other 4xx do not."""
+    if isinstance(exc, requests.HTTPError) and exc.response is not None:
+        code = exc.response.status_code
+        return code >= 500 or code == 429
+    return isinstance(exc, requests.RequestException)
+
+
+class ResilientHttp:
+    """
+    GET wrapper for one news source that:
+      - fails fast with CircuitOpenError while the source's breaker is open,
+      - sends one hedged duplicate when the first attempt is slower than the
+        source's `hedge_percentile` latency, returning whichever finishes first,
+      - tracks p50/p95/p99 latency of successful requests.
+
+    Responses are returned after raise_for_status(), so HTTP errors surface as
+    requests.HTTPError like any other requests.RequestException.
+
+    Usage:
+        http = get_http("google_news")
+        resp = http.get(url, timeout=10)
+    """
+
+    def __init__(
+        self,
+        source: str,
+        *,
+        hedge_percentile: float = 95,
+        initial_hedge_delay: float = 2.0,
+        min_hedge_delay: float = 0.25,
+        min_samples: int = 20,
+        failure_threshold: int = 5,
+        reset_timeout: float = 60.0,
+    ):
+        self.source = source
+        self.hedge_percentile = hedge_percentile
+        self.initial_hedge_delay = initial_hedge_delay
+        self.min_hedge_delay = min_hedge_delay
+        self.min_samples = min_samples
+        self.latency = LatencyTracker()
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self.stats = {"requests": 0, "hedged": 0, "hedge_wins": 0, "failures": 0, "short_circuited": 0}
+
+    def hedge_delay(self) -> float:
+        if len(self.latency) < self.min_samples:
+            return self.initial_hedge_delay
+        return max(self.min_hedge_delay, self.latency.percentile(self.hedge_percentile) or 0.0)
+
+    def _attempt(self, url: str, kwargs: Dict) -> requests.Response:
+        resp = requests.get(url, **kwargs)
+        resp.raise_for_status()
+        return resp
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        if not self.breaker.allow():
+            self.stats["short_circuited"] += 1
+            raise CircuitOpenError(f"Circuit open for {self.source}; skipping request")
+        self.stats["requests"] += 1
+
+        # Latencies are measured from when the primary was sent, so a winning
+        # hedge counts the wait before it was sent too.
+        sent = time.monotonic()
+        primary = _EXECUTOR.submit(self._attempt, url, kwargs)
+        pending = {primary}
+        delay = self.hedge_delay()
+        done, _ = wait(pending, timeout=delay)
+        if not done and self.breaker.state == "closed":
+            logger.debug("Hedging slow %s request after %.2fs: %s", self.source, delay, url)
+            self.stats["hedged"] += 1
+            pending.add(_EXECUTOR.submit(self._attempt, url, kwargs))
+
+        error: BaseException | None = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                exc = fut.exception()
+                if exc is not None:
+                    error = error or exc
+                    continue
+                resp = fut.result()
+                self.latency.record(time.monotonic() - sent)
+                if fut is not primary:
+                    self.stats["hedge_wins"] += 1
+                    # Also sample the slow primary once it lands; dropping it
+                    # would pull the percentile, and so the hedge delay, down.
+                    primary.add_done_callback(
+                        lambda f: f.exception() is None and self.latency.record(time.monotonic() - sent)
+                    )
+                self.breaker.record_success()
+                return resp  # any attempt still in flight finishes in the background
+
+        if _is_source_failure(error):
+            self.stats["failures"] += 1
+            if self.breaker.record_failure():
+                logger.warning("Circuit opened for %s after %d consecutive failures", self.source, self.breaker.failures)
+        else:
+            self.breaker.record_success()
+        raise error
+
+    def summary(self) -> Dict:
+        return {**self.latency.summary(), **self.stats, "circuit": self.breaker.state}
+
+
+_SOURCES: Dict[str, ResilientHttp] = {}
+_SOURCES_LOCK = threading.Lock()
+
+
+def get_http(source: str, **kwargs) -> ResilientHttp:
+    """Return the process-wide ResilientHttp for `source`, creating it on first use."""
+    with _SOURCES_LOCK:
+        if source not in _SOURCES:
+            _SOURCES[source] = ResilientHttp(source, **kwargs)
+        return _SOURCES[source]
+
+
+def latency_report() -> Dict[str, Dict]:
+    """Per-source latency percentiles, hedge counts and breaker state for this process."""
+    with _SOURCES_LOCK:
+        return {name: http.summary() for name, http in _SOURCES.items()}
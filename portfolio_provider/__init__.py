@@ -1,4 +1,9 @@
-from .base_provider import BaseProvider
+from .base_provider import BaseProvider, aggregate_positions
+from .file_provider import FileProvider, StreamingProvider, SyntheticProvider
 from .snaptrade_provider import SnapTradeProvider
+from .factory import create_provider
 
-__all__ = ['BaseProvider', 'SnapTradeProvider']
+__all__ = [
+    'BaseProvider', 'FileProvider', 'SnapTradeProvider', 'StreamingProvider', 'SyntheticProvider',
+    'aggregate_positions', 'create_provider',
+]
@@ -1,12 +1,68 @@
 from abc import ABC, abstractmethod
-from typing import Dict
+from typing import Dict, Iterable, List
 from logging_config import get_logger
 
 logger = get_logger(__name__)
 
 
 class BaseProvider(ABC):
+    """
+    Contract for portfolio sources. `get_positions()` returns exactly one
+    normalized position per ticker, aggregated across accounts:
+      [{"ticker": "TSM", "qty": 3.0, "avg_cost": 101.2, "last_price": 140.5,
+        "account_id": "abc", "account_count": 1}, ...]
+
+      - qty: total quantity over all accounts; tickers netting to 0 are dropped
+      - avg_cost: quantity-weighted over the lots that report one, else None
+      - last_price: last price seen, else None
+      - account_id: the holding account if exactly one holds the ticker, else None
+      - account_count: number of distinct accounts holding the ticker
+
+    Cash equivalents and rows without a ticker are excluded. Implementations
+    can build the list with `aggregate_positions()`.
+    """
+
     @abstractmethod
-    def get_positions(self):
+    def get_positions(self) -> List[Dict]:
         """Return list of normalized positions. Implementations should log successes and failures."""
         pass
+
+
+def aggregate_positions(rows: Iterable[Dict]) -> List[Dict]:
+    """
+    Fold per-lot rows ({ticker, qty, avg_cost, last_price, account_id}, numbers
+    as float or None) into the one-position-per-ticker shape BaseProvider
+    documents. Memory grows with the number of distinct tickers, not rows, so
+    `rows` can be a lazy stream.
+    """
+    acc: Dict[str, Dict] = {}
+    for r in rows:
+        a = acc.get(r["ticker"])
+        if a is None:
+            a = acc[r["ticker"]] = {
+                "qty": 0.0, "cost": 0.0, "cost_qty": 0.0, "last_price": None, "accounts": set(),
+            }
+        qty = r["qty"]
+        a["qty"] += qty
+        if r.get("avg_cost") is not None:
+            a["cost"] += qty * r["avg_cost"]
+            a["cost_qty"] += qty
+        if r.get("last_price") is not None:
+            a["last_price"] = r["last_price"]
+        if r.get("account_id") is not None:
+            a["accounts"].add(r["account_id"])
+
+    out = []
+    for ticker, a in acc.items():
+        if not a["qty"]:
+            continue
+        accounts = a["accounts"]
+        out.append({
+            "ticker": ticker,
+            "qty": a["qty"],
+            "avg_cost": a["cost"] / a["cost_qty"] if a["cost_qty"] else None,
+            "last_price": a["last_price"],
+            "account_id": next(iter(accounts)) if len(accounts) == 1 else None,
+            "account_count": len(accounts),
+        })
+    return out
@@ -0,0 +1,30 @@
+import os
+
+from logging_config import get_logger
+from .base_provider import BaseProvider
+from .file_provider import FileProvider, SyntheticProvider
+from .snaptrade_provider import SnapTradeProvider
+
+logger = get_logger(__name__)
+
+
+def create_provider(name: str | None = None) -> BaseProvider:
+    """
+    Build the portfolio provider selected by `name` or PORTFOLIO_PROVIDER:
+      - "snaptrade" (default): live SnapTrade accounts
+      - "file": exported holdings at PORTFOLIO_FILE (.csv / .jsonl, optionally .gz)
+      - "synthetic": generated holdings; SYNTHETIC_ROWS / SYNTHETIC_ACCOUNTS / SYNTHETIC_TICKERS
+    """
+    name = (name or os.getenv("PORTFOLIO_PROVIDER") or "snaptrade").strip().lower()
+    logger.info("Using portfolio provider: %s", name)
+    if name == "snaptrade":
+        return SnapTradeProvider()
+    if name == "file":
+        return FileProvider()
+    if name == "synthetic":
+        return SyntheticProvider(
+            rows=int(os.getenv("SYNTHETIC_ROWS", "100000")),
+            accounts=int(os.getenv("SYNTHETIC_ACCOUNTS", "50")),
+            tickers=int(os.getenv("SYNTHETIC_TICKERS", "500")),
+        )
+    raise ValueError(f"Unknown PORTFOLIO_PROVIDER: {name}")
@@ -0,0 +1,172 @@
+import csv
+import gzip
+import io
+import json
+import os
+import random
+from abc import abstractmethod
+from pathlib import Path
+from typing import Dict, Iterator, List
+
+from logging_config import get_logger
+from .base_provider import BaseProvider, aggregate_positions
+
+logger = get_logger(__name__)
+
+# Accepted column names per normalized field, in lookup order.
+FIELD_ALIASES = {
+    "ticker": ("ticker", "symbol", "raw_symbol"),
+    "qty": ("qty", "quantity", "units", "shares", "fractional_units"),
+    "avg_cost": ("avg_cost", "average_purchase_price", "cost_basis_per_share", "avg_price"),
+    "last_price": ("last_price", "price", "market_price"),
+    "account_id": ("account_id", "account", "account_number"),
+}
+_TRUTHY = {"1", "true", "yes", "y"}
+
+
+def _pick(row: Dict, field: str):
+    for key in FIELD_ALIASES[field]:
+        val = row.get(key)
+        if val not in (None, ""):
+            return val
+    return None
+
+
+def _to_float(val) -> float | None:
+    if val is None:
+        return None
+    try:
+        return float(str(val).replace(",", "").replace("$", ""))
+    except ValueError:
+        return None
+
+
+class StreamingProvider(BaseProvider):
+    """
+    Base for providers that produce raw holdings rows one at a time. Rows
+    from `_iter_raw()` (dicts with lower-case keys, see FIELD_ALIASES) are
+    normalized lazily and aggregated by ticker on the fly.
+    """
+
+    source = "<stream>"  # shown in logs
+
+    @abstractmethod
+    def _iter_raw(self) -> Iterator[Dict]:
+        """Yield raw rows with lower-cased keys."""
+        pass
+
+    def iter_rows(self) -> Iterator[Dict]:
+        """Yield normalized per-lot rows lazily; rows without a ticker or quantity are skipped."""
+        seen = skipped = 0
+        for raw in self._iter_raw():
+            seen += 1
+            if seen == 1:
+                missing = [f for f in ("ticker", "qty") if not any(k in raw for k in FIELD_ALIASES[f])]
+                if missing:
+                    logger.warning(
+                        "No %s column in %s (columns: %s); expected one of %s. Rows without them are skipped.",
+                        " or ".join(missing), self.source, ", ".join(sorted(raw)) or "none",
+                        "; ".join(", ".join(FIELD_ALIASES[f]) for f in missing),
+                    )
+            if str(raw.get("cash_equivalent") or "").strip().lower() in _TRUTHY:
+                continue
+            ticker = _pick(raw, "ticker")
+            qty = _to_float(_pick(raw, "qty"))
+            if not ticker or qty is None:
+                skipped += 1
+                continue
+            account = _pick(raw, "account_id")
+            yield {
+                "ticker": str(ticker).strip().upper(),
+                "qty": qty,
+                "avg_cost": _to_float(_pick(raw, "avg_cost")),
+                "last_price": _to_float(_pick(raw, "last_price")),
+                "account_id": str(account) if account is not None else None,
+            }
+        logger.info("Read %d holdings rows from %s (%d skipped)", seen, self.source, skipped)
+
+    def get_positions(self) -> List[Dict]:
+        try:
+            positions = aggregate_positions(self.iter_rows())
+            logger.info("Aggregated %d positions from %s", len(positions), self.source)
+            return positions
+        except OSError:
+            logger.exception("Failed to read holdings from %s", self.source)
+            return []
+
+
+class FileProvider(StreamingProvider):
+    """
+    Reads exported holdings from CSV or JSONL (optionally .gz), one lot per
+    row/line, possibly spanning many accounts. The file is streamed, never
+    loaded whole.
+
+    Usage:
+        provider = FileProvider("exports/holdings.csv.gz")
+        positions = provider.get_positions()
+    """
+
+    def __init__(self, path: str | os.PathLike | None = None, *, file_format: str | None = None):
+        path = path or os.getenv("PORTFOLIO_FILE")
+        if not path:
+            raise ValueError("PORTFOLIO_FILE environment variable is not set.")
+        self.path = Path(path)
+        self.source = str(self.path)
+        suffixes = [s.lower() for s in self.path.suffixes if s.lower() != ".gz"]
+        self.file_format = (file_format or (suffixes[-1].lstrip(".") if suffixes else "")).lower()
+        if self.file_format == "ndjson":
+            self.file_format = "jsonl"
+        if self.file_format not in ("csv", "jsonl"):
+            raise ValueError(f"Unsupported holdings file format for {self.path}; expected .csv or .jsonl.")
+
+    def _open(self) -> io.TextIOBase:
+        # utf-8-sig strips the BOM Excel and many broker exports write.
+        if self.path.suffix.lower() == ".gz":
+            return gzip.open(self.path, "rt", encoding="utf-8-sig", newline="")
+        return self.path.open("r", encoding="utf-8-sig", newline="")
+
+    def _iter_raw(self) -> Iterator[Dict]:
+        with self._open() as f:
+            if self.file_format == "csv":
+                for row in csv.DictReader(f):
+                    yield {(k or "").strip().lower(): v for k, v in row.items()}
+            else:
+                for lineno, line in enumerate(f, 1):
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        obj = json.loads(line)
+                    except json.JSONDecodeError:
+                        logger.warning("Skipping malformed JSON on line %d of %s", lineno, self.path)
+                        continue
+                    if isinstance(obj, dict):
+                        yield {str(k).lower(): v for k, v in obj.items()}
+
+
+class SyntheticProvider(StreamingProvider):
+    """
+    Generates random holdings rows in memory through the same normalize and
+    aggregate path as FileProvider. Useful for load-testing the rest of the
+    pipeline without a broker account or export file.
+    """
+
+    def __init__(self, rows: int = 100_000, accounts: int = 50, tickers: List[str] | int = 500, seed: int | None = 0):
+        self.source = "<synthetic>"
+        self.rows, self.accounts = rows, accounts
+        self.tickers = tickers if isinstance(tickers, list) else [f"SYN{i:04d}" for i in range(tickers)]
+        self.seed = seed
+
+    def _iter_raw(self) -> Iterator[Dict]:
+        rng = random.Random(self.seed)
+        base_price = {t: rng.uniform(5, 500) for t in self.tickers}
+        for _ in range(self.rows):
+            t = rng.choice(self.tickers)
+            price = base_price[t]
+            yield {
+                "ticker": t,
+                "qty": round(rng.uniform(0.1, 100), 4),
+                "avg_cost": round(price * rng.uniform(0.6, 1.2), 2),
+                "last_price": round(price, 2),
+                "account_id": f"synthetic-{rng.randrange(self.accounts)}",
+            }
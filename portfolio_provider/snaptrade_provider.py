@@ -1,14 +1,16 @@
 import os, json
 from pathlib import Path
+from typing import Dict, List
 from snaptrade_client import SnapTrade, ApiException
 from logging_config import get_logger
+from .base_provider import BaseProvider, aggregate_positions
 
 USER_SECRET_FILE = Path("user_secret.json")
 
 logger = get_logger(__name__)
 
 
-class SnapTradeProvider:
+class SnapTradeProvider(BaseProvider):
     def __init__(self):
         try:
             self.client_id = os.environ["SNAPTRADE_CLIENT_ID"]
@@ -25,7 +27,26 @@ class SnapTradeProvider:
             raise
 
     # ---------- data ----------
-    def get_positions(self):
+    def get_positions(self) -> List[Dict]:
+        rows = []
+        for p in self.get_raw_positions():
+            if p.get("cash_equivalent"):
+                continue
+            sym = (p.get("symbol") or {}).get("symbol") or {}
+            ticker = sym.get("raw_symbol") or sym.get("symbol")
+            if not ticker:
+                continue
+            avg_cost, price = p.get("average_purchase_price"), p.get("price")
+            rows.append({
+                "ticker": ticker,
+                "qty": float(p.get("units") or p.get("fractional_units") or 0),
+                "avg_cost": float(avg_cost) if avg_cost is not None else None,
+                "last_price": float(price) if price is not None else None,
+                "account_id": p.get("account_id"),
+            })
+        return aggregate_positions(rows)
+
+    def get_raw_positions(self):
         try:
             accounts_resp = self.snaptrade.account_information.list_user_accounts(
                 user_id=self.user_id,
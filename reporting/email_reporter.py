@@ -2,6 +2,7 @@ import os
 import smtplib
 from dotenv import load_dotenv
 from datetime import datetime
+from email.mime.application import MIMEApplication
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 
@@ -18,9 +19,18 @@ class EmailReporter(BaseReporter):
     Send HTML + plaintext multipart emails. Usage:
         reporter.send_report(html_body, subject="Daily Portfolio Update", is_html=True)
     If is_html=True and no plaintext is provided, a minimal text fallback is auto-generated.
+    Optional attachments: [{"filename": "report.html.gz", "content": b"...", "mimetype": "application/gzip"}, ...]
     """
 
-    def send_report(self, report: str, *, subject: str | None = None, is_html: bool = False, plain_fallback: str | None = None):
+    def send_report(
+        self,
+        report: str,
+        *,
+        subject: str | None = None,
+        is_html: bool = False,
+        plain_fallback: str | None = None,
+        attachments: list[dict] | None = None,
+    ):
         email_server = os.getenv("EMAIL_SERVER", "")
         email_port = os.getenv("EMAIL_PORT", "")
         email_username = os.getenv("EMAIL_USERNAME", "")
@@ -53,6 +63,15 @@ class EmailReporter(BaseReporter):
         else:
             msg = MIMEText(report, "plain", "utf-8")
 
+        if attachments:
+            body, msg = msg, MIMEMultipart("mixed")
+            msg.attach(body)
+            for a in attachments:
+                maintype, _, subtype = (a.get("mimetype") or "application/octet-stream").partition("/")
+                part = MIMEApplication(a["content"], _subtype=subtype or "octet-stream")
+                part.add_header("Content-Disposition", "attachment", filename=a["filename"])
+                msg.attach(part)
+
         msg["Subject"] = subject
         msg["From"] = sender
         msg["To"] = recipient
@@ -1,5 +1,16 @@
+import gzip
+import re
 from html import escape
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Tuple
+
+from logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# Gmail clips messages whose HTML exceeds ~102KB; stay under it by default.
+DEFAULT_MAX_EMAIL_BYTES = 100_000
+
+_STYLE_ATTR = re.compile(r"""\sstyle=(["'])(.*?)\1""", re.S)
 
 def _sentiment_badge(sentiment: str) -> str:
     s = (sentiment or "").lower()
@@ -11,7 +22,15 @@ def _sentiment_badge(sentiment: str) -> str:
         f'background:{bg};color:{color};font-weight:600;font-size:12px;line-height:1;">{escape(label)}</span>'
     )
 
-def _card_for_position(pos: Dict[str, Any], analysis: Dict[str, Any] | None) -> str:
+def _format_trend(trend: Dict[str, Any] | None) -> str:
+    parts = []
+    for key, label in (("d1", "1d"), ("d7", "7d"), ("d30", "30d")):
+        v = (trend or {}).get(key)
+        if v is not None:
+            parts.append(f"{label} {v:+.2f}")
+    return " · ".join(parts)
+
+def _card_for_position(pos: Dict[str, Any], analysis: Dict[str, Any] | None, trend: Dict[str, Any] | None = None) -> str:
     t = pos["ticker"]
     qty = f"{pos['qty']:.6f}"
     last_price = pos.get("last_price")
@@ -22,6 +41,7 @@ def _card_for_position(pos: Dict[str, Any], analysis: Dict[str, Any] | None) ->
     sentiment = (result or {}).get("sentiment") or ""
     reasons   = (result or {}).get("reasons") or []
     because   = f" (because: {', '.join(reasons)})" if reasons else ""
+    as_of     = (result or {}).get("as_of")  # set on analysis carried over from an earlier run
 
     metrics_rows = [
         f"<tr><td style='color:#6b7280;'>Quantity</td><td style='text-align:right;font-weight:600;color:#111827;'>{escape(qty)}</td></tr>",
@@ -37,6 +57,13 @@ def _card_for_position(pos: Dict[str, Any], analysis: Dict[str, Any] | None) ->
             f"<td style='text-align:right;font-weight:600;color:#111827;'>{escape(str(avg_cost))}</td></tr>"
         )
 
+    trend_text = _format_trend(trend)
+    if trend_text:
+        metrics_rows.append(
+            f"<tr><td style='color:#6b7280;'>Sentiment Trend</td>"
+            f"<td style='text-align:right;font-weight:600;color:#111827;'>{escape(trend_text)}</td></tr>"
+        )
+
     bullets_html = "".join(f"<li style='margin:0 0 6px 0;'>{escape(str(b))}</li>" for b in bullets)
 
     return f"""
@@ -49,7 +76,7 @@ def _card_for_position(pos: Dict[str, Any], analysis: Dict[str, Any] | None) ->
             <h2 style="margin:0 0 4px 0;font-size:20px;line-height:1.2;color:#111827;">{escape(t)}</h2>
             {_sentiment_badge(sentiment)}
           </div>
-          <div style="font-size:12px;color:#6b7280;margin:0 0 12px 0;">News summary & sentiment</div>
+          <div style="font-size:12px;color:#6b7280;margin:0 0 12px 0;">{"Watchlist · " if pos.get("watchlist") else ""}News summary & sentiment</div>
 
           <table role="presentation" width="100%" cellpadding="0" cellspacing="0" style="border-collapse:separate;margin:0 0 12px 0;">
             <tbody>
@@ -57,7 +84,7 @@ def _card_for_position(pos: Dict[str, Any], analysis: Dict[str, Any] | None) ->
             </tbody>
           </table>
 
-          <div style="font-weight:600;color:#111827;margin:8px 0 6px 0;">News Analysis</div>
+          <div style="font-weight:600;color:#111827;margin:8px 0 6px 0;">News Analysis{f" <span style='font-weight:400;color:#6b7280;font-size:12px;'>(as of {escape(str(as_of))})</span>" if as_of else ""}</div>
           {"<ul style='padding-left:20px;margin:0 0 8px 0;'>" + bullets_html + "</ul>" if bullets else "<div style='color:#6b7280;'>No analysis</div>"}
           {f"<div style='color:#374151;font-size:14px;margin-top:6px;'><strong>Overall sentiment:</strong> {escape(sentiment.capitalize() if sentiment else 'N/A')}{escape(because)}</div>" if result else ""}
         </td>
@@ -65,22 +92,91 @@ def _card_for_position(pos: Dict[str, Any], analysis: Dict[str, Any] | None) ->
     </table>
     """
 
+def _summary_table(positions: List[Dict[str, Any]], analysis_by_ticker: Dict[str, Dict[str, Any]], hidden: int = 0) -> str:
+    rows = []
+    for pos in positions:
+        t = pos["ticker"]
+        sentiment = (analysis_by_ticker.get(t) or {}).get("sentiment") or ""
+        qty = f"{pos['qty']:.6f}"
+        last_price = pos.get("last_price")
+        rows.append(
+            f"<tr><td style='padding:4px 0;font-weight:600;color:#111827;'>{escape(t)}</td>"
+            f"<td style='padding:4px 0;text-align:right;color:#374151;'>{escape(qty)}</td>"
+            f"<td style='padding:4px 0;text-align:right;color:#374151;'>{escape(str(last_price)) if last_price is not None else ''}</td>"
+            f"<td style='padding:4px 0;text-align:right;color:#374151;'>{escape(sentiment.capitalize() if sentiment else 'N/A')}</td></tr>"
+        )
+    if hidden:
+        rows.append(f"<tr><td colspan='4' style='padding:8px 0 0 0;color:#6b7280;'>{hidden} more in the attached report</td></tr>")
+    return f"""
+    <table role="presentation" width="100%" cellpadding="0" cellspacing="0"
+           style="border-collapse:separate;background:#ffffff;border:1px solid #e5e7eb;
+                  border-radius:12px;padding:16px;margin:0 0 16px 0;font-size:13px;">
+      <tr>
+        <td colspan="4" style="font-weight:600;color:#111827;padding:0 0 8px 0;">Other holdings ({len(positions) + hidden})</td>
+      </tr>
+      <tr>
+        <td style="color:#6b7280;">Ticker</td><td style="color:#6b7280;text-align:right;">Quantity</td>
+        <td style="color:#6b7280;text-align:right;">Last Price</td><td style="color:#6b7280;text-align:right;">Sentiment</td>
+      </tr>
+      {''.join(rows)}
+    </table>
+    """
+
+def _compact_html(html: str) -> str:
+    """Move repeated inline styles into a <style> block of short classes and strip inter-tag whitespace."""
+    def norm(style: str) -> str:
+        return re.sub(r"\s+", " ", style).strip().rstrip(";").replace("; ", ";").replace(": ", ":")
+
+    counts: Dict[str, int] = {}
+    for m in _STYLE_ATTR.finditer(html):
+        key = norm(m.group(2))
+        counts[key] = counts.get(key, 0) + 1
+    classes = {style: f"s{i}" for i, style in enumerate(k for k, n in counts.items() if n > 1)}
+
+    def repl(m: re.Match) -> str:
+        style = norm(m.group(2))
+        cls = classes.get(style)
+        return f' class="{cls}"' if cls else f' style="{style}"'
+
+    html = _STYLE_ATTR.sub(repl, html)
+    if classes:
+        css = "".join(f".{cls}{{{style}}}" for style, cls in classes.items())
+        html = html.replace("</head>", f"<style>{css}</style></head>", 1)
+    html = re.sub(r">\s+<", "><", html)
+    return re.sub(r"\s{2,}", " ", html).strip()
+
 def build_portfolio_html_report(
     positions: List[Dict[str, Any]],
     analysis_by_ticker: Dict[str, Dict[str, Any]] | None,
     *,
+    trends_by_ticker: Dict[str, Dict[str, Any]] | None = None,
     title: str = "Daily Portfolio Update",
     subtitle: str = "Top holdings, headlines, and sentiment",
+    collapsed_positions: List[Dict[str, Any]] | None = None,
+    collapsed_hidden: int = 0,
+    note: str | None = None,
+    compact: bool = False,
 ) -> str:
+    """
+    Render the report. `collapsed_positions` are listed in a summary table
+    after the cards instead of getting a card each, followed by a
+    "N more in the attached report" row when `collapsed_hidden` is set. With `compact=True`,
+    repeated inline styles are deduped into CSS classes and the markup is
+    minified, which roughly halves the size of large reports.
+    """
     cards = []
     analysis_by_ticker = analysis_by_ticker or {}
+    trends_by_ticker = trends_by_ticker or {}
     for pos in positions:
         t = pos["ticker"]
-        cards.append(_card_for_position(pos, analysis_by_ticker.get(t)))
+        cards.append(_card_for_position(pos, analysis_by_ticker.get(t), trends_by_ticker.get(t)))
 
+    if collapsed_positions or collapsed_hidden:
+        cards.append(_summary_table(collapsed_positions or [], analysis_by_ticker, collapsed_hidden))
     body = "".join(cards) if cards else "<div style='color:#6b7280;'>No positions found.</div>"
+    note_html = f"<div style='color:#374151;font-size:13px;margin:0 0 16px 0;'>{escape(note)}</div>" if note else ""
 
-    return f"""\
+    html = f"""\
 <!doctype html>
 <html>
   <head>
@@ -96,6 +192,7 @@ def build_portfolio_html_report(
               <td style="padding:0 16px 16px;">
                 <h1 style="font-size:24px;line-height:1.25;margin:0 0 12px 0;color:#111827;">{escape(title)}</h1>
                 <div style="color:#6b7280;margin:0 0 16px 0;font-size:14px;">{escape(subtitle)}</div>
+                {note_html}
                 {body}
                 <div style="color:#9ca3af;font-size:12px;margin-top:16px;">Automated report</div>
               </td>
@@ -107,10 +204,99 @@ def build_portfolio_html_report(
   </body>
 </html>
 """
+    return _compact_html(html) if compact else html
+
+def _position_priority(pos: Dict[str, Any], analysis: Dict[str, Any] | None) -> Tuple[float, int]:
+    value = abs(float(pos.get("qty") or 0) * float(pos.get("last_price") or 0))
+    signal = 1 if ((analysis or {}).get("sentiment") or "").lower() in ("positive", "negative") else 0
+    return (value, signal)
 
-def build_plaintext_fallback(positions: List[Dict[str, Any]], analysis_by_ticker: Dict[str, Dict[str, Any]] | None) -> str:
+def build_budgeted_html_report(
+    positions: List[Dict[str, Any]],
+    analysis_by_ticker: Dict[str, Dict[str, Any]] | None,
+    *,
+    max_bytes: int = DEFAULT_MAX_EMAIL_BYTES,
+    attachment_name: str = "portfolio_report.html.gz",
+    **kwargs: Any,
+) -> Tuple[str, List[Dict[str, Any]]]:
+    """
+    Render a report whose HTML fits in `max_bytes`, escalating only as needed:
+      1. the regular report, if it fits;
+      2. the compact report;
+      3. the compact report with the lowest-priority positions (smallest
+         position value, then no clear sentiment) collapsed into a summary
+         table, plus the full report as a gzip attachment.
+    Returns (html, attachments) where attachments are
+      [{"filename": str, "content": bytes, "mimetype": str}, ...].
+    """
+    analysis_by_ticker = analysis_by_ticker or {}
+    full = build_portfolio_html_report(positions, analysis_by_ticker, **kwargs)
+    full_size = len(full.encode("utf-8"))
+    if full_size <= max_bytes:
+        logger.info("Report size %d bytes (budget %d)", full_size, max_bytes)
+        return full, []
+
+    html = build_portfolio_html_report(positions, analysis_by_ticker, compact=True, **kwargs)
+    attachments: List[Dict[str, Any]] = []
+    if len(html.encode("utf-8")) > max_bytes:
+        ranked = sorted(range(len(positions)), key=lambda i: _position_priority(positions[i], analysis_by_ticker.get(positions[i]["ticker"])), reverse=True)
+
+        def render(keep: int, rows: int | None = None) -> str:
+            # Collapsed positions stay in priority order so truncation drops the least important.
+            kept = set(ranked[:keep])
+            collapsed = [positions[i] for i in ranked[keep:]]
+            shown = collapsed if rows is None else collapsed[:rows]
+            return build_portfolio_html_report(
+                [p for i, p in enumerate(positions) if i in kept],
+                analysis_by_ticker,
+                collapsed_positions=shown,
+                collapsed_hidden=len(collapsed) - len(shown),
+                note=f"{len(collapsed)} smaller holdings are summarized below; the full report is attached ({attachment_name}).",
+                compact=True,
+                **kwargs,
+            )
+
+        def largest_fitting(n: int, fn) -> int:
+            """Largest k in [0, n] with fn(k) within budget (0 if none fit)."""
+            lo, hi = 0, n
+            while lo < hi:
+                mid = (lo + hi + 1) // 2
+                if len(fn(mid).encode("utf-8")) <= max_bytes:
+                    lo = mid
+                else:
+                    hi = mid - 1
+            return lo
+
+        # Largest number of full cards that still fits; if even the full
+        # summary table is too big, keep as many summary rows as fit.
+        keep = largest_fitting(len(positions) - 1, render)
+        html = render(keep)
+        if len(html.encode("utf-8")) > max_bytes:
+            rows = largest_fitting(len(positions) - keep, lambda r: render(keep, r))
+            html = render(keep, rows)
+            logger.info("Summary table truncated to %d of %d rows to fit report budget", rows, len(positions) - keep)
+        attachments.append({
+            "filename": attachment_name,
+            "content": gzip.compress(full.encode("utf-8")),
+            "mimetype": "application/gzip",
+        })
+        logger.info("Collapsed %d of %d positions into summary table to fit report budget", len(positions) - keep, len(positions))
+
+    size = len(html.encode("utf-8"))
+    if size > max_bytes:
+        # Only possible when the budget is smaller than an empty report.
+        logger.warning("Report still exceeds budget: %d > %d bytes", size, max_bytes)
+    logger.info("Report size %d bytes (budget %d, saved %d bytes vs %d)", size, max_bytes, full_size - size, full_size)
+    return html, attachments
+
+def build_plaintext_fallback(
+    positions: List[Dict[str, Any]],
+    analysis_by_ticker: Dict[str, Dict[str, Any]] | None,
+    trends_by_ticker: Dict[str, Dict[str, Any]] | None = None,
+) -> str:
     lines = ["Daily Portfolio Update", ""]
     analysis_by_ticker = analysis_by_ticker or {}
+    trends_by_ticker = trends_by_ticker or {}
     for pos in positions:
         t = pos["ticker"]
         lines.append(f"--- {t} ---")
@@ -119,11 +305,14 @@ def build_plaintext_fallback(positions: List[Dict[str, Any]], analysis_by_ticker
             lines.append(f"Last Price: {pos['last_price']}")
         if pos.get("avg_cost") is not None:
             lines.append(f"Avg Cost: {pos['avg_cost']}")
+        trend_text = _format_trend(trends_by_ticker.get(t))
+        if trend_text:
+            lines.append(f"Sentiment Trend: {trend_text}")
         res = analysis_by_ticker.get(t) or {}
         bullets = res.get("summary_bullets") or []
         sentiment = res.get("sentiment")
         reasons = res.get("reasons") or []
-        lines.append("News Analysis:")
+        lines.append(f"News Analysis (as of {res['as_of']}):" if res.get("as_of") else "News Analysis:")
         lines.extend(f"- {b}" for b in bullets)
         if sentiment:
             because = f" (because: {', '.join(reasons)})" if reasons else ""
@@ -0,0 +1,3 @@
+from .watchlist_scheduler import WatchlistScheduler, load_watchlist
+
+__all__ = ['WatchlistScheduler', 'load_watchlist']
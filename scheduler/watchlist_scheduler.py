@@ -0,0 +1,261 @@
+import heapq
+import json
+import os
+from datetime import date
+from pathlib import Path
+from typing import Any, Dict, Iterable, List
+
+from logging_config import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_STATE_FILE = Path("./data/scheduler_state.json")
+
+# Per tier: share of the run budget it is guaranteed, how often (in runs) its
+# symbols are due, and its base priority. Unused share flows to other tiers,
+# then to symbols that are not due yet.
+TIERS = {
+    "held_large": {"share": 0.60, "refresh_every": 1, "weight": 4.0},
+    "held_small": {"share": 0.25, "refresh_every": 2, "weight": 2.0},
+    "watchlist":  {"share": 0.15, "refresh_every": 5, "weight": 1.0},
+}
+
+
+def load_watchlist(path: str | os.PathLike | None = None) -> List[str]:
+    """
+    Read watchlist symbols from WATCHLIST_FILE (one per line, '#' comments
+    allowed) and/or the comma-separated WATCHLIST variable.
+    """
+    symbols: List[str] = []
+    path = path or os.getenv("WATCHLIST_FILE")
+    if path:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    sym = line.split("#", 1)[0].strip()
+                    if sym:
+                        symbols.append(sym.upper())
+        except OSError:
+            logger.exception("Failed to read watchlist file %s", path)
+    symbols.extend(s.strip().upper() for s in (os.getenv("WATCHLIST") or "").split(",") if s.strip())
+    return list(dict.fromkeys(symbols))
+
+
+class WatchlistScheduler:
+    """
+    Decides which symbols get news + LLM work this run under a fixed budget.
+
+    Every symbol gets a tier: held with at least `large_weight` of portfolio
+    value, other holdings, or watchlist-only. Each tier is guaranteed its
+    share of the run's capacity (the budget divided by per-symbol request and
+    token cost). Per-symbol cost starts from the `requests_per_symbol` and
+    `tokens_per_symbol` estimates and then follows a moving average of the
+    usage passed to commit(); capacity a tier can't use goes to the highest-priority
+    leftovers of any tier. Within the budget, symbols are picked from a
+    priority queue where priority grows with the runs since the last refresh
+    (fair-share aging), so low tiers are refreshed less often but are never
+    starved. A tier's `refresh_every` only decides which symbols go first:
+    capacity left after every due symbol is placed is filled with symbols
+    that are not due yet, so a portfolio that fits the budget is refreshed
+    every run.
+
+    Usage:
+        scheduler = WatchlistScheduler(max_requests=500, max_llm_tokens=200_000)
+        planned = scheduler.plan(positions, load_watchlist())
+        ...
+        scheduler.commit(planned, analysis, usage={"requests": 130, "llm_tokens": 61_000})
+    """
+
+    def __init__(
+        self,
+        state_path: str | os.PathLike | None = None,
+        *,
+        max_requests: int = 500,
+        max_llm_tokens: int = 200_000,
+        requests_per_symbol: float = 1,
+        tokens_per_symbol: float = 1500,
+        large_weight: float = 0.05,
+        aging_rate: float = 1.0,
+        usage_smoothing: float = 0.3,
+    ):
+        self.state_path = Path(state_path or os.getenv("SCHEDULER_STATE_FILE") or DEFAULT_STATE_FILE)
+        self.max_requests = max_requests
+        self.max_llm_tokens = max_llm_tokens
+        self.requests_per_symbol = max(1, requests_per_symbol)
+        self.tokens_per_symbol = max(1, tokens_per_symbol)
+        self.large_weight = large_weight
+        self.aging_rate = aging_rate
+        self.usage_smoothing = usage_smoothing
+        self.state = self._load_state()
+        # Measured costs only apply to the settings they were measured under
+        # (e.g. turning on article enrichment changes both).
+        estimate = [self.requests_per_symbol, self.tokens_per_symbol]
+        if self.state["cost"].get("estimate") != estimate:
+            self.state["cost"] = {"estimate": estimate}
+
+    # ---------- state ----------
+    def _load_state(self) -> Dict[str, Any]:
+        try:
+            with self.state_path.open("r", encoding="utf-8") as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            state = {}
+        except (OSError, json.JSONDecodeError):
+            logger.exception("Failed to read scheduler state %s; starting fresh", self.state_path)
+            state = {}
+        state.setdefault("run", 0)
+        state.setdefault("last_refreshed", {})
+        state.setdefault("last_attempted", {})
+        state.setdefault("first_seen", {})
+        state.setdefault("analysis", {})
+        state.setdefault("cost", {})
+        return state
+
+    def _save_state(self) -> None:
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.state_path.with_suffix(".tmp")
+        with tmp.open("w", encoding="utf-8") as f:
+            json.dump(self.state, f)
+        os.replace(tmp, self.state_path)
+
+    # ---------- planning ----------
+    def tiers_for(self, positions: List[Dict[str, Any]], watchlist: Iterable[str]) -> Dict[str, str]:
+        """Return {symbol: tier} for every held and watched symbol."""
+        values: Dict[str, float | None] = {}
+        for p in positions:
+            price = p.get("last_price")
+            if price is None:
+                values.setdefault(p["ticker"], None)
+                continue
+            values[p["ticker"]] = (values.get(p["ticker"]) or 0.0) + abs(float(p.get("qty") or 0) * float(price))
+        total = sum(v for v in values.values() if v)
+
+        tiers: Dict[str, str] = {}
+        for sym, value in values.items():
+            weight = value / total if total and value is not None else 0.0
+            tiers[sym] = "held_large" if weight >= self.large_weight else "held_small"
+        for sym in watchlist:
+            tiers.setdefault(sym, "watchlist")
+        return tiers
+
+    def cost_per_symbol(self) -> tuple[float, float]:
+        """(requests, LLM tokens) one symbol is expected to cost: measured when available, else estimated."""
+        cost = self.state["cost"]
+        return cost.get("requests") or self.requests_per_symbol, cost.get("tokens") or self.tokens_per_symbol
+
+    def capacity(self) -> int:
+        requests, tokens = self.cost_per_symbol()
+        return min(int(self.max_requests / requests), int(self.max_llm_tokens / tokens))
+
+    def _priority(self, sym: str, tier: str, run: int) -> tuple[bool, float]:
+        cfg = TIERS[tier]
+        last = self.state["last_refreshed"].get(sym)
+        if last is None:
+            # Never refreshed: due now, and ageing from when it was first seen.
+            last = self.state["first_seen"].get(sym, run) - cfg["refresh_every"]
+        staleness = run - last
+        # A failed attempt (no news, or analysis failed) keeps ageing from the
+        # last real refresh but is not due again for a full interval.
+        attempted = self.state["last_attempted"].get(sym, last)
+        due = staleness >= cfg["refresh_every"] and run - attempted >= cfg["refresh_every"]
+        return due, cfg["weight"] * (1.0 + self.aging_rate * staleness / cfg["refresh_every"])
+
+    def plan(self, positions: List[Dict[str, Any]], watchlist: Iterable[str] = ()) -> List[Dict[str, Any]]:
+        """
+        Returns symbols to refresh this run, highest priority first:
+          [{"symbol": "TSM", "tier": "held_large", "priority": 8.0}, ...]
+        """
+        run = self.state["run"] + 1
+        tiers = self.tiers_for(positions, watchlist)
+        capacity = self.capacity()
+
+        queues: Dict[str, List] = {t: [] for t in TIERS}
+        not_due: List = []
+        for sym, tier in tiers.items():
+            self.state["first_seen"].setdefault(sym, run)
+            due, prio = self._priority(sym, tier, run)
+            if due:
+                queues[tier].append((-prio, sym))
+            else:
+                not_due.append((-prio, sym, tier))
+        for q in queues.values():
+            heapq.heapify(q)
+
+        picked: List[Dict[str, Any]] = []
+
+        def take(tier: str, n: int) -> None:
+            q = queues[tier]
+            for _ in range(min(n, len(q))):
+                neg, sym = heapq.heappop(q)
+                picked.append({"symbol": sym, "tier": tier, "priority": -neg})
+
+        # Guaranteed share per tier, then leftovers by global priority.
+        for tier, cfg in TIERS.items():
+            take(tier, int(capacity * cfg["share"]))
+        leftover = [(neg, sym, tier) for tier, q in queues.items() for neg, sym in q]
+        for neg, sym, tier in heapq.nsmallest(capacity - len(picked), leftover):
+            picked.append({"symbol": sym, "tier": tier, "priority": -neg})
+        # Spare capacity goes to symbols refreshed recently, stalest first.
+        for neg, sym, tier in heapq.nsmallest(max(0, capacity - len(picked)), not_due):
+            picked.append({"symbol": sym, "tier": tier, "priority": -neg})
+
+        picked.sort(key=lambda p: -p["priority"])
+        counts = {t: sum(1 for p in picked if p["tier"] == t) for t in TIERS}
+        totals = {t: sum(1 for v in tiers.values() if v == t) for t in TIERS}
+        requests, tokens = self.cost_per_symbol()
+        logger.info(
+            "Scheduled %d of %d symbols (capacity %d at %.1f requests / %.0f tokens per symbol): %s",
+            len(picked), len(tiers), capacity, requests, tokens,
+            ", ".join(f"{t} {counts[t]}/{totals[t]}" for t in TIERS),
+        )
+        return picked
+
+    def commit(
+        self,
+        planned: List[Dict[str, Any]],
+        analysis_by_ticker: Dict[str, Dict[str, Any]] | None = None,
+        *,
+        usage: Dict[str, int] | None = None,
+    ) -> None:
+        """
+        Record the run: planned symbols count as attempted, but only those that
+        came back with analysis count as refreshed (and have it remembered).
+        `usage` is what the run actually spent, {"requests": n, "llm_tokens": n},
+        and updates the per-symbol cost used by capacity(). Advances the run counter.
+        """
+        analysis_by_ticker = analysis_by_ticker or {}
+        run = self.state["run"] = self.state["run"] + 1
+        refreshed = 0
+        for p in planned:
+            sym = p["symbol"]
+            self.state["last_attempted"][sym] = run
+            if sym in analysis_by_ticker:
+                self.state["last_refreshed"][sym] = run
+                refreshed += 1
+        today = date.today().isoformat()
+        for sym, res in analysis_by_ticker.items():
+            self.state["analysis"][sym] = {**res, "as_of": today}
+        self._record_usage(len(planned), usage or {})
+        if refreshed < len(planned):
+            logger.info("%d of %d scheduled symbols got no news or analysis; they stay stale", len(planned) - refreshed, len(planned))
+        try:
+            self._save_state()
+        except OSError:
+            logger.exception("Failed to save scheduler state %s", self.state_path)
+
+    def _record_usage(self, symbols: int, usage: Dict[str, int]) -> None:
+        if not symbols:
+            return
+        cost = self.state["cost"]
+        for key, spent in (("requests", usage.get("requests")), ("tokens", usage.get("llm_tokens"))):
+            if not spent:
+                continue  # nothing measured (e.g. the LLM call failed); keep the previous figure
+            per_symbol = spent / symbols
+            prev = cost.get(key)
+            cost[key] = per_symbol if prev is None else prev + self.usage_smoothing * (per_symbol - prev)
+        logger.info("Run usage: %s over %d symbols", usage, symbols)
+
+    def cached_analysis(self, symbols: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """Last stored analysis for symbols, each with the "as_of" date it was produced."""
+        cache = self.state["analysis"]
+        return {s: cache[s] for s in symbols if s in cache}
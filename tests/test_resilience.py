@@ -0,0 +1,26 @@
+import time
+import types
+
+from news_fetcher import resilience
+
+
+def test_hedged_latency_counts_from_primary_send(monkeypatch):
+    calls = []
+
+    def fake_get(url, **kwargs):
+        attempt = len(calls)
+        calls.append(attempt)
+        time.sleep(0.4 if attempt == 0 else 0.05)
+        return types.SimpleNamespace(raise_for_status=lambda: None, attempt=attempt)
+
+    monkeypatch.setattr(resilience.requests, "get", fake_get)
+    http = resilience.ResilientHttp("test", initial_hedge_delay=0.1)
+
+    assert http.get("https://example.com").attempt == 1
+    assert http.stats["hedge_wins"] == 1
+    time.sleep(0.5)  # let the slow primary finish in the background
+
+    samples = sorted(http.latency._samples)
+    assert len(samples) == 2
+    assert samples[0] >= 0.15  # hedge delay + hedge's own time
+    assert samples[1] >= 0.4   # the primary that lost
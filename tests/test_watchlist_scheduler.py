@@ -0,0 +1,37 @@
+from scheduler import WatchlistScheduler
+
+
+def _positions(n: int):
+    return [{"ticker": f"T{i:02d}", "qty": 1.0, "last_price": 100.0} for i in range(n)]
+
+
+def _run(scheduler: WatchlistScheduler, positions, watchlist=()):
+    planned = scheduler.plan(positions, watchlist)
+    scheduler.commit(planned, {p["symbol"]: {"sentiment": "neutral"} for p in planned})
+    return planned
+
+
+def test_small_portfolio_is_refreshed_every_run(tmp_path):
+    scheduler = WatchlistScheduler(tmp_path / "state.json")
+    positions = _positions(25)  # 4% each: all held_small, due every other run
+    for _ in range(6):
+        planned = _run(scheduler, positions)
+        assert sorted(p["symbol"] for p in planned) == sorted(p["ticker"] for p in positions)
+
+
+def test_due_symbols_go_first_when_capacity_is_short(tmp_path):
+    scheduler = WatchlistScheduler(tmp_path / "state.json", max_requests=10, requests_per_symbol=1)
+    positions = _positions(20)
+    first = {p["symbol"] for p in _run(scheduler, positions)}
+    second = {p["symbol"] for p in _run(scheduler, positions)}
+    assert len(first) == len(second) == 10
+    assert first.isdisjoint(second)
+
+
+def test_watchlist_is_not_starved(tmp_path):
+    scheduler = WatchlistScheduler(tmp_path / "state.json", max_requests=10, requests_per_symbol=1)
+    positions = [{"ticker": f"H{i:02d}", "qty": 1.0, "last_price": 100.0} for i in range(10)]
+    seen = set()
+    for _ in range(10):
+        seen.update(p["symbol"] for p in _run(scheduler, positions, ["W1", "W2"]))
+    assert {"W1", "W2"} <= seen
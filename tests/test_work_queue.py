@@ -0,0 +1,120 @@
+import sqlite3
+import threading
+import time
+
+from distributed.sharding import run_coordinator
+from distributed.work_queue import WorkQueue
+
+
+def _queue(tmp_path, **kwargs) -> WorkQueue:
+    return WorkQueue(tmp_path / "queue.sqlite", **kwargs)
+
+
+def test_enqueue_splits_into_units(tmp_path):
+    q = _queue(tmp_path)
+    assert q.enqueue("run", ["A", "B", "C", "D", "E"], unit_size=2) == 3
+    assert q.progress("run") == {"pending": 3, "leased": 0, "done": 0, "failed": 0}
+    assert q.outstanding() == 3
+
+
+def test_journal_mode_defaults_to_rollback(tmp_path):
+    q = _queue(tmp_path)
+    with sqlite3.connect(q.path) as conn:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "delete"
+    q = WorkQueue(tmp_path / "local.sqlite", wal=True)
+    with sqlite3.connect(q.path) as conn:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+
+def test_claim_is_exclusive_until_lease_expires(tmp_path):
+    q = _queue(tmp_path, lease_seconds=0.2)
+    q.enqueue("run", ["A"], unit_size=1)
+
+    unit_id, run_id, tickers = q.claim("w1")
+    assert (run_id, tickers) == ("run", ["A"])
+    assert q.claim("w2") is None
+    assert q.outstanding("run") == 1
+
+    time.sleep(0.3)
+    reclaimed = q.claim("w2")
+    assert reclaimed is not None and reclaimed[0] == unit_id
+    assert not q.heartbeat(unit_id, "w1")
+    assert q.heartbeat(unit_id, "w2")
+
+
+def test_stale_complete_is_discarded(tmp_path):
+    q = _queue(tmp_path, lease_seconds=0.2)
+    q.enqueue("run", ["A"], unit_size=1)
+    unit_id, _, _ = q.claim("w1")
+    time.sleep(0.3)
+    q.claim("w2")
+
+    assert not q.complete(unit_id, "w1", {"analysis": {"A": "stale"}})
+    assert q.complete(unit_id, "w2", {"analysis": {"A": "fresh"}})
+    assert list(q.results("run")) == [{"analysis": {"A": "fresh"}}]
+    assert q.outstanding() == 0
+
+
+def test_expired_lease_fails_after_max_attempts(tmp_path):
+    q = _queue(tmp_path, lease_seconds=0.1, max_attempts=2)
+    q.enqueue("run", ["A", "B"], unit_size=2)
+
+    for owner in ("w1", "w2"):
+        assert q.claim(owner) is not None
+        time.sleep(0.15)
+
+    assert q.claim("w3") is None
+    assert q.progress("run")["failed"] == 1
+    assert q.failed_tickers("run") == ["A", "B"]
+
+
+def test_fail_retries_then_gives_up(tmp_path):
+    q = _queue(tmp_path, max_attempts=2)
+    q.enqueue("run", ["A"], unit_size=1)
+
+    unit_id, _, _ = q.claim("w1")
+    q.fail(unit_id, "w1", "boom")
+    assert q.progress("run")["pending"] == 1
+
+    unit_id, _, _ = q.claim("w1")
+    q.fail(unit_id, "w1", "boom")
+    assert q.progress("run")["failed"] == 1
+
+
+def test_coordinator_merges_unit_results(tmp_path):
+    path = tmp_path / "queue.sqlite"
+    q = WorkQueue(path)
+
+    def worker() -> None:
+        completed, deadline = 0, time.monotonic() + 5
+        while completed < 2 and time.monotonic() < deadline:
+            claimed = q.claim("thread-worker")
+            if claimed is None:
+                time.sleep(0.02)
+                continue
+            unit_id, _, tickers = claimed
+            completed += 1
+            q.complete(unit_id, "thread-worker", {
+                "items": {t: [{"title": f"{t} news", "link": f"https://example.com/{t}"}] for t in tickers},
+                "analysis": {t: {"sentiment": "neutral"} for t in tickers},
+                "usage": {"requests": len(tickers), "llm_tokens": 100},
+            })
+
+    t = threading.Thread(target=worker, daemon=True)
+    t.start()
+    items, analysis, usage = run_coordinator(["A", "B", "C"], str(path), workers=0, unit_size=2, timeout=10, poll_interval=0.05)
+    t.join()
+
+    assert sorted(items) == ["A", "B", "C"]
+    assert sorted(analysis) == ["A", "B", "C"]
+    assert usage == {"requests": 3, "llm_tokens": 200}
+    assert q.outstanding() == 0  # run purged
+
+
+def test_coordinator_gives_up_without_workers(tmp_path):
+    started = time.monotonic()
+    items, analysis, _ = run_coordinator(
+        ["A"], str(tmp_path / "queue.sqlite"), workers=0, timeout=10, poll_interval=0.05, unclaimed_timeout=0.2,
+    )
+    assert (items, analysis) == ({}, {})
+    assert time.monotonic() - started < 5